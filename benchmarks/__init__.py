@@ -0,0 +1,3 @@
+"""
+Micro-benchmarks for the hot paths of the nodes. Run with "python -m benchmarks" from the repository root.
+"""
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+Command line entry point: python -m benchmarks [--filter TEXT] [--output FILE] [--baseline FILE] [--save-baseline]
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from .cases import all_cases
+from .harness import compare, load_results, run_cases, save_results
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _format_bytes(value: int) -> str:
+	return f"{value / 1024 ** 2:.2f} MiB" if value >= 1024 ** 2 else f"{value / 1024:.1f} KiB"
+
+
+def _print_case(name: str, measured) -> None:
+	print(
+		f"{name:<56} {measured['median_s'] * 1e6:>12.1f} us  "
+		f"rss peak {_format_bytes(measured['peak_rss_bytes']):>12}  out {_format_bytes(measured['output_bytes']):>12}"
+	)
+
+
+def main(argv = None) -> int:
+	parser = argparse.ArgumentParser(prog = "python -m benchmarks", description = "Micro-benchmarks for the node hot paths.")
+	parser.add_argument("--filter", default = "", help = "only run cases whose name contains this text")
+	parser.add_argument("--repeat", type = int, default = 5, help = "timing samples per case (default 5)")
+	parser.add_argument("--min-time", type = float, default = 0.02, help = "minimum seconds per sample (default 0.02)")
+	parser.add_argument("--output", type = Path, help = "write the results as JSON to this file")
+	parser.add_argument("--baseline", type = Path, default = DEFAULT_BASELINE, help = "baseline JSON to compare against")
+	parser.add_argument("--save-baseline", action = "store_true", help = "store the results as the new baseline")
+	parser.add_argument("--tolerance", type = float, default = 0.25, help = "allowed slowdown or growth (default 0.25 = 25%%)")
+	args = parser.parse_args(argv)
+
+	with tempfile.TemporaryDirectory(prefix = "tojioo_bench_") as workdir:
+		results = run_cases(all_cases(workdir), args.filter, args.repeat, args.min_time, progress = _print_case)
+	for name, reason in results["skipped"].items():
+		print(f"{name:<56} skipped: {reason}")
+
+	if args.output:
+		save_results(results, args.output)
+	if args.save_baseline:
+		save_results(results, args.baseline)
+		print(f"Baseline saved to {args.baseline}")
+		return 0
+	if not args.baseline.is_file():
+		print(f"No baseline at {args.baseline}, comparison skipped (run with --save-baseline to create one)")
+		return 0
+
+	try:
+		regressions = compare(results, load_results(args.baseline), args.tolerance)
+	except ValueError as e:
+		print(f"Not compared with {args.baseline}: {e}", file = sys.stderr)
+		return 2
+	for r in regressions:
+		print(f"REGRESSION {r['case']} {r['metric']}: {r['baseline']:.6g} -> {r['current']:.6g} ({r['ratio']:.2f}x)", file = sys.stderr)
+	print(f"{len(regressions)} regression(s) against {args.baseline}")
+	return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
\ No newline at end of file
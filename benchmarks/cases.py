@@ -0,0 +1,163 @@
+"""
+Benchmark cases for the hot paths of the nodes: batch merges, bus chains, switches and preview encoding.
+Each case builds its inputs only when it is selected.
+"""
+
+import functools
+from typing import Any, Callable, Dict, Iterator, List
+from unittest.mock import patch
+
+from .harness import case, make_tensor
+
+
+def _batch_values(type_name: str, inputs: int, batch: int, side: int, mixed: bool) -> List[Any]:
+	values = []
+	for i in range(inputs):
+		size = side // 2 if mixed and i % 2 else side
+		if type_name == "IMAGE":
+			values.append(make_tensor(batch, size, size, 3))
+		elif type_name == "MASK":
+			values.append(make_tensor(batch, size, size))
+		elif type_name == "LATENT":
+			values.append({"samples": make_tensor(batch, 4, size // 8, size // 8)})
+		else:
+			values.append([[make_tensor(batch, 77, 768), {"pooled_output": make_tensor(batch, 768)}]])
+	return values
+
+
+def _setup_batch_merge(type_name: str, inputs: int, batch: int, side: int, mixed: bool) -> Callable[[], Any]:
+	from python.handlers.batch_handler import BatchHandler
+
+	prep, merge = BatchHandler.get_handler(type_name)
+	values = _batch_values(type_name, inputs, batch, side, mixed)
+	return lambda: merge(values, [prep(v) for v in values])
+
+
+def batch_merge_cases() -> Iterator[Dict[str, Any]]:
+	"""BatchHandler prep and merge, as run by the batch switch nodes."""
+	grid = [
+		(type_name, inputs, batch, side, False)
+		for type_name in ("IMAGE", "MASK", "LATENT")
+		for inputs in (2, 8)
+		for batch in (1, 4)
+		for side in (64, 512)
+	]
+	grid += [("IMAGE", 8, 4, 512, True), ("CONDITIONING", 2, 1, 0, False), ("CONDITIONING", 8, 1, 0, False)]
+
+	for type_name, inputs, batch, side, mixed in grid:
+		shape = (f"/{side}x{side}" + ("/mixed" if mixed else "")) if side else ""
+		yield case(
+			f"batch_merge/{type_name}/inputs={inputs}/batch={batch}{shape}",
+			functools.partial(_setup_batch_merge, type_name, inputs, batch, side, mixed),
+			type = type_name, inputs = inputs, batch = batch, side = side, mixed = mixed,
+		)
+
+
+_BUS_TYPES = ("IMAGE", "LATENT", "MODEL", "STRING")
+
+
+def _setup_bus_chain(length: int, entries: int) -> Callable[[], Any]:
+	from python.nodes.dynamic_bus import PT_DynamicBus
+
+	value = make_tensor(1, 64, 64, 3)
+	bus = {i: {"data": value, "type": _BUS_TYPES[i % len(_BUS_TYPES)]} for i in range(entries)}
+	nodes = [PT_DynamicBus() for _ in range(length)]
+	output_hints = "1:IMAGE:1," + ",".join(f"{i + 2}:{t}:0" for i, t in enumerate(_BUS_TYPES))
+
+
+	def run():
+		outputs = (bus,)
+		for node in nodes:
+			outputs = node.run(bus = outputs[0], _slot_types = "1:IMAGE", _output_hints = output_hints, input_1 = value)
+		return outputs[0]
+
+
+	return run
+
+
+def bus_chain_cases() -> Iterator[Dict[str, Any]]:
+	"""
+	Chains of PT_DynamicBus nodes, each adding one value to the bus and unpacking one value per type from it,
+	starting from a bus that already holds the given number of entries.
+	"""
+	for length in (1, 8, 64):
+		for entries in (0, 100, 500):
+			yield case(
+				f"bus_chain/nodes={length}/entries={entries}",
+				functools.partial(_setup_bus_chain, length, entries),
+				nodes = length, entries = entries,
+			)
+
+
+def _setup_switch(slots: int, connected: str) -> Callable[[], Any]:
+	from python.controllers.switch_controller import SwitchController
+
+	node = SwitchController.create_nodes()["PT_AnyImageSwitch"]()
+	value = make_tensor(1, 64, 64, 3)
+	kwargs = {f"image_{i}": value if connected == "all" or i == slots else None for i in range(1, slots + 1)}
+	return lambda: node.run(**kwargs)
+
+
+def switch_cases() -> Iterator[Dict[str, Any]]:
+	"""Switch node selection with every slot connected, or only the last one."""
+	for slots in (2, 32, 256):
+		for connected in ("all", "last"):
+			yield case(
+				f"switch/slots={slots}/connected={connected}",
+				functools.partial(_setup_switch, slots, connected),
+				slots = slots, connected = connected,
+			)
+
+
+class _NullServer:
+	client_id = None
+
+
+	def send_sync(self, event, data, sid = None):
+		pass
+
+
+def _setup_preview(workdir: str, transport: str, frames: int, side: int) -> Callable[[], Any]:
+	import folder_paths
+
+	from python.nodes import dynamic_preview
+	from python.utils.preview_transport import TempFileTransport, WebSocketTransport
+
+	if hasattr(folder_paths.get_save_image_path, "return_value"):
+		folder_paths.get_save_image_path.return_value = (workdir, "preview", 0, "", "")
+
+	if transport == "temp":
+		factory = lambda prompt = None, extra_pnginfo = None: TempFileTransport(cache = None, embed_metadata = False)
+	else:
+		factory = lambda prompt = None, extra_pnginfo = None: WebSocketTransport(_NullServer())
+	node = dynamic_preview.PT_DynamicPreview()
+	images = make_tensor(frames, side, side, 3)
+
+
+	def run():
+		with patch.object(dynamic_preview, "create_preview_transport", factory):
+			return node.preview_images(input_1 = images)
+
+
+	return run
+
+
+def preview_cases(workdir: str) -> Iterator[Dict[str, Any]]:
+	"""
+	PT_DynamicPreview on image batches: PNG files written to workdir with the preview cache disabled, and
+	in-memory PNGs through the websocket transport.
+	"""
+	for transport in ("temp", "websocket"):
+		for frames, side in ((1, 64), (16, 64), (256, 64), (16, 512)):
+			yield case(
+				f"preview/{transport}/frames={frames}/{side}x{side}",
+				functools.partial(_setup_preview, workdir, transport, frames, side),
+				requires_torch = True, transport = transport, frames = frames, side = side,
+			)
+
+
+def all_cases(workdir: str) -> Iterator[Dict[str, Any]]:
+	yield from batch_merge_cases()
+	yield from bus_chain_cases()
+	yield from switch_cases()
+	yield from preview_cases(workdir)
\ No newline at end of file
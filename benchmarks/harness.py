@@ -0,0 +1,186 @@
+"""
+Timing, memory measurement and baseline comparison for the benchmark suite.
+
+Importing this module sets up the same environment as the tests: ComfyUI modules are stood in for, and
+without torch installed tensors are replaced by the shape-only TensorStub from tests/conftest.py.
+"""
+
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from unittest.mock import MagicMock
+
+
+ROOT = Path(__file__).resolve().parent.parent
+for _path in (ROOT, ROOT / "tests"):
+	if str(_path) not in sys.path:
+		sys.path.insert(0, str(_path))
+
+import conftest
+import torch
+
+from python.utils.metrics import CallPeakMemory
+from python.utils.node_profiler import value_nbytes
+
+
+STUB = isinstance(torch, MagicMock)
+TensorStub = getattr(conftest, "TensorStub", None)
+
+
+def make_tensor(*shape: int):
+	"""Random float32 tensor, or a TensorStub of that shape when torch is not installed."""
+	if STUB:
+		return TensorStub(shape)
+	return torch.rand(*shape)
+
+
+def case(name: str, setup: Callable[[], Callable[[], Any]], requires_torch: bool = False, **params: Any) -> Dict[str, Any]:
+	"""A benchmark case; setup builds the inputs and returns the callable that is timed."""
+	return {"name": name, "setup": setup, "requires_torch": requires_torch, "params": params}
+
+
+def _time_loops(run: Callable[[], Any], loops: int) -> float:
+	gc_was_enabled = gc.isenabled()
+	gc.disable()
+	try:
+		start = time.perf_counter()
+		for _ in range(loops):
+			run()
+		return time.perf_counter() - start
+	finally:
+		if gc_was_enabled:
+			gc.enable()
+
+
+def measure(run: Callable[[], Any], repeat: int = 5, min_time: float = 0.02) -> Dict[str, Any]:
+	"""
+	Times run and measures the memory of one call.
+
+	The loop count is doubled until one sample takes at least min_time, then repeat samples are taken.
+
+	Returns:
+	    Dict[str, Any]: Per-call min, median and mean seconds, loops per sample, the peak of Python allocations
+	    (tracemalloc, informational: tensor storage is not traced), the peak RSS increase and the tensor bytes of
+	    the result.
+	"""
+	result = run()
+	loops = 1
+	while _time_loops(run, loops) < min_time and loops < 1 << 20:
+		loops *= 2
+	samples = [_time_loops(run, loops) / loops for _ in range(max(1, repeat))]
+
+	tracemalloc.start()
+	try:
+		tracemalloc.reset_peak()
+		run()
+		peak_py = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+	gc.collect()
+	with CallPeakMemory() as peak:
+		run()
+
+	return {
+		"min_s": min(samples),
+		"median_s": statistics.median(samples),
+		"mean_s": statistics.fmean(samples),
+		"loops": loops,
+		"samples": len(samples),
+		"peak_py_bytes": peak_py,
+		"peak_rss_bytes": peak.peak_bytes,
+		"output_bytes": value_nbytes(result),
+	}
+
+
+def environment() -> Dict[str, Any]:
+	return {
+		"tensors": "stub" if STUB else "torch",
+		"torch": None if STUB else torch.__version__,
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"cpu_count": os.cpu_count(),
+		"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+	}
+
+
+def run_cases(
+	cases: Iterable[Dict[str, Any]], pattern: str = "", repeat: int = 5, min_time: float = 0.02,
+	progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+	"""
+	Measures every case whose name contains pattern.
+
+	Returns:
+	    Dict[str, Any]: {"meta": environment, "cases": {name: params and measurements}, "skipped": {name: reason}}.
+	"""
+	results: Dict[str, Any] = {"meta": environment(), "cases": {}, "skipped": {}}
+	for entry in cases:
+		name = entry["name"]
+		if pattern and pattern not in name:
+			continue
+		if entry["requires_torch"] and STUB:
+			results["skipped"][name] = "requires torch"
+			continue
+		measured = {"params": entry["params"], **measure(entry["setup"](), repeat, min_time)}
+		results["cases"][name] = measured
+		if progress is not None:
+			progress(name, measured)
+	return results
+
+
+# Metric, minimum absolute increase that counts as a regression. The RSS floor absorbs allocator and page noise;
+# peak_py_bytes is not compared, since tracemalloc does not see tensor storage
+_COMPARED = (
+	("median_s", 1e-6),
+	("peak_rss_bytes", 8 * 1024 * 1024),
+	("output_bytes", 0),
+)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25) -> List[Dict[str, Any]]:
+	"""
+	Cases whose time or memory grew by more than tolerance (0.25 = 25%) over the baseline.
+
+	Raises:
+	    ValueError: When the results and the baseline were measured with different tensor backends.
+	"""
+	ours, theirs = results["meta"].get("tensors"), baseline.get("meta", {}).get("tensors")
+	if ours != theirs:
+		raise ValueError(f"Baseline was measured with {theirs} tensors, these results with {ours} tensors")
+
+	regressions = []
+	for name, current in results["cases"].items():
+		previous = baseline.get("cases", {}).get(name)
+		if previous is None:
+			continue
+		for metric, floor in _COMPARED:
+			before, after = previous.get(metric), current.get(metric)
+			if before is None or after is None:
+				continue
+			if after > before * (1 + tolerance) and after - before > floor:
+				regressions.append({
+					"case": name,
+					"metric": metric,
+					"baseline": before,
+					"current": after,
+					"ratio": after / before if before else math.inf,
+				})
+	return regressions
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+	with open(path, "r", encoding = "utf-8") as f:
+		return json.load(f)
+
+
+def save_results(results: Dict[str, Any], path: Path) -> None:
+	path.parent.mkdir(parents = True, exist_ok = True)
+	with open(path, "w", encoding = "utf-8") as f:
+		json.dump(results, f, indent = 2)
\ No newline at end of file
@@ -0,0 +1,405 @@
+"""
+Replays the Tojioo nodes of a saved ComfyUI workflow without ComfyUI or a GPU.
+
+The workflow is read in the UI format the frontend saves, subgraphs are expanded, and every Tojioo node runs in
+topological order. All other nodes become stub producers that emit synthetic values of their output types, so
+only the nodes of this package are timed. Reports end-to-end throughput, per-node latency and peak memory.
+
+Usage: python -m benchmarks.replay "example_workflows/Tojioo Passthrough.json" [--runs 5] [--side 512]
+"""
+
+import argparse
+import heapq
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .harness import environment, make_tensor, save_results
+
+from python.utils.metrics import PeakMemory
+from python.utils.node_profiler import value_nbytes
+
+
+_INPUT_NODE = -10
+_OUTPUT_NODE = -20
+_MUTED = 2
+_BYPASSED = 4
+_WIDGET_TYPES = {"INT", "FLOAT", "STRING", "BOOLEAN"}
+_SCALARS = {"INT": 1, "FLOAT": 1.0, "STRING": "", "BOOLEAN": False}
+
+
+class StubObject:
+	"""Opaque stand-in for models, CLIPs, VAEs and other values that have no synthetic form."""
+
+
+	def __init__(self, type_name: str) -> None:
+		self.type_name = type_name
+
+
+	def __repr__(self) -> str:
+		return f"<stub {self.type_name}>"
+
+
+def _link_fields(link) -> Tuple[int, int, int, int, int]:
+	"""(id, origin id, origin slot, target id, target slot) from the list form of the root graph or the dict form of subgraphs."""
+	if isinstance(link, dict):
+		return link["id"], link["origin_id"], link["origin_slot"], link["target_id"], link["target_slot"]
+	return link[0], link[1], link[2], link[3], link[4]
+
+
+def flatten_workflow(workflow: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+	"""
+	Expands the subgraphs of a UI-format workflow into one flat graph. Reroutes are resolved to their source.
+
+	Returns:
+	    Dict[str, Dict[str, Any]]: Nodes keyed by id path ("482:79" is node 79 inside subgraph node 482), each with
+	    type, mode, widgets_values, input types, output types and the (node key, slot) feeding each linked input.
+	"""
+	subgraphs = {sg["id"]: sg for sg in workflow.get("definitions", {}).get("subgraphs", [])}
+	flat: Dict[str, Dict[str, Any]] = {}
+	_expand(workflow.get("nodes", []), workflow.get("links", []), "", {}, 0, subgraphs, flat)
+	return flat
+
+
+def _expand(nodes, links, prefix: str, boundary: Dict[int, Optional[tuple]], mode: int, subgraphs, flat) -> Dict[int, Optional[tuple]]:
+	"""Adds the nodes of one graph level to flat and returns the sources of its subgraph outputs by slot."""
+	by_id = {node["id"]: node for node in nodes}
+	by_link = {}
+	for link in links:
+		link_id, origin_id, origin_slot, target_id, target_slot = _link_fields(link)
+		by_link[link_id] = (origin_id, origin_slot, target_id, target_slot)
+	expanded: Dict[int, Dict[int, Optional[tuple]]] = {}
+
+
+	def resolve(link_id) -> Optional[tuple]:
+		if link_id not in by_link:
+			return None
+		origin_id, origin_slot, _, _ = by_link[link_id]
+		if origin_id == _INPUT_NODE:
+			return boundary.get(origin_slot)
+		origin = by_id.get(origin_id)
+		if origin is None:
+			return None
+		if origin["type"] == "Reroute":
+			inputs = origin.get("inputs") or []
+			return resolve(inputs[0].get("link")) if inputs else None
+		if origin["type"] in subgraphs:
+			return expand(origin).get(origin_slot)
+		return f"{prefix}{origin_id}", origin_slot
+
+
+	def expand(node) -> Dict[int, Optional[tuple]]:
+		if node["id"] not in expanded:
+			inner_boundary = {slot: resolve(inp.get("link")) for slot, inp in enumerate(node.get("inputs") or [])}
+			subgraph = subgraphs[node["type"]]
+			expanded[node["id"]] = _expand(
+				subgraph.get("nodes", []), subgraph.get("links", []), f"{prefix}{node['id']}:", inner_boundary,
+				node.get("mode", 0) or mode, subgraphs, flat,
+			)
+		return expanded[node["id"]]
+
+
+	for node in nodes:
+		if node["type"] in subgraphs:
+			expand(node)
+			continue
+		if node["type"] == "Reroute":
+			continue
+		inputs = node.get("inputs") or []
+		flat[f"{prefix}{node['id']}"] = {
+			"type": node["type"],
+			"mode": node.get("mode", 0) or mode,
+			"widgets_values": node.get("widgets_values") or [],
+			"input_types": {inp["name"]: inp.get("type", "*") for inp in inputs},
+			"inputs": {inp["name"]: resolve(inp.get("link")) for inp in inputs if inp.get("link") is not None},
+			"outputs": [out.get("type", "*") for out in node.get("outputs") or []],
+		}
+
+	return {
+		target_slot: resolve(link_id)
+		for link_id, (_, _, target_id, target_slot) in by_link.items() if target_id == _OUTPUT_NODE
+	}
+
+
+def replicate(flat: Dict[str, Dict[str, Any]], copies: int) -> Dict[str, Dict[str, Any]]:
+	"""copies independent copies of a flat graph, keyed "<copy>/<key>", to scale the node count."""
+	if copies <= 1:
+		return flat
+	result = {}
+	for copy in range(copies):
+		for key, node in flat.items():
+			inputs = {
+				name: (f"{copy}/{source[0]}", source[1]) if source is not None else None
+				for name, source in node["inputs"].items()
+			}
+			result[f"{copy}/{key}"] = {**node, "inputs": inputs}
+	return result
+
+
+def topological_order(flat: Dict[str, Dict[str, Any]]) -> List[str]:
+	"""Node keys ordered so every node comes after the nodes feeding it; ties keep key order."""
+	dependents: Dict[str, List[str]] = {key: [] for key in flat}
+	pending = {}
+	for key, node in flat.items():
+		sources = {source[0] for source in node["inputs"].values() if source is not None and source[0] in flat}
+		pending[key] = len(sources)
+		for source in sources:
+			dependents[source].append(key)
+
+	ready = [key for key, count in pending.items() if count == 0]
+	heapq.heapify(ready)
+	order = []
+	while ready:
+		key = heapq.heappop(ready)
+		order.append(key)
+		for dependent in dependents[key]:
+			pending[dependent] -= 1
+			if pending[dependent] == 0:
+				heapq.heappush(ready, dependent)
+	if len(order) != len(flat):
+		raise ValueError("Workflow graph has a cycle")
+	return order
+
+
+def _widget_names(cls) -> List[str]:
+	"""Names of the inputs of a node class that the frontend stores in widgets_values, in order."""
+	names = []
+	spec = cls.INPUT_TYPES()
+	for section in ("required", "optional", "hidden"):
+		for name, value in dict(spec.get(section) or {}).items():
+			if not isinstance(value, tuple) or not value:
+				continue
+			options = value[1] if len(value) > 1 and isinstance(value[1], dict) else {}
+			if (isinstance(value[0], list) or value[0] in _WIDGET_TYPES) and not options.get("forceInput"):
+				names.append(name)
+	return names
+
+
+def synthetic_value(type_name: str, batch: int, side: int) -> Any:
+	"""A value of the given ComfyUI type: random tensors for images, masks, latents and conditioning."""
+	if type_name == "IMAGE":
+		return make_tensor(batch, side, side, 3)
+	if type_name == "MASK":
+		return make_tensor(batch, side, side)
+	if type_name == "LATENT":
+		return {"samples": make_tensor(batch, 4, max(1, side // 8), max(1, side // 8))}
+	if type_name == "CONDITIONING":
+		return [[make_tensor(batch, 77, 768), {"pooled_output": make_tensor(batch, 768)}]]
+	if type_name in _SCALARS:
+		return _SCALARS[type_name]
+	return StubObject(type_name)
+
+
+class Replay:
+	"""Executes the Tojioo nodes of a flat graph, feeding them synthetic values for everything else."""
+
+
+	def __init__(self, flat: Dict[str, Dict[str, Any]], mappings: Dict[str, type], batch: int = 1, side: int = 512) -> None:
+		self.flat = flat
+		self.mappings = mappings
+		self.batch = batch
+		self.side = side
+
+		needed = set()
+		stack = [key for key, node in flat.items() if node["type"] in mappings]
+		while stack:
+			key = stack.pop()
+			if key in needed or key not in flat:
+				continue
+			needed.add(key)
+			stack.extend(source[0] for source in flat[key]["inputs"].values() if source is not None)
+		self.order = [key for key in topological_order(flat) if key in needed]
+		self.executed = [key for key in self.order if flat[key]["type"] in mappings]
+		self.errors: Dict[str, str] = {}
+		self._widgets = {key: self._widget_kwargs(flat[key]) for key in self.executed}
+
+
+	def _widget_kwargs(self, node: Dict[str, Any]) -> Dict[str, Any]:
+		values = node["widgets_values"]
+		if isinstance(values, dict):
+			return dict(values)
+		return dict(zip(_widget_names(self.mappings[node["type"]]), values))
+
+
+	def _stub_outputs(self, node: Dict[str, Any]) -> List[Any]:
+		if node["type"] == "PrimitiveNode" and node["widgets_values"]:
+			return [node["widgets_values"][0]]
+		return [synthetic_value(type_name, self.batch, self.side) for type_name in node["outputs"]]
+
+
+	def _kwargs(self, key: str, values: Dict[str, List[Any]]) -> Dict[str, Any]:
+		kwargs = dict(self._widgets[key])
+		for name, source in self.flat[key]["inputs"].items():
+			outputs = values.get(source[0]) if source is not None else None
+			if outputs is not None and source[1] < len(outputs) and outputs[source[1]] is not None:
+				kwargs[name] = outputs[source[1]]
+		return kwargs
+
+
+	def _bypass(self, key: str, kwargs: Dict[str, Any]) -> List[Any]:
+		"""Bypassed nodes forward the first linked input of each output's type, as ComfyUI does."""
+		node = self.flat[key]
+		linked = [(node["input_types"].get(name), kwargs[name]) for name in node["inputs"] if name in kwargs]
+		return [next((value for type_name, value in linked if type_name == output), None) for output in node["outputs"]]
+
+
+	def _execute(self, key: str, kwargs: Dict[str, Any]) -> List[Any]:
+		node = self.flat[key]
+		if node["mode"] == _MUTED:
+			return [None] * len(node["outputs"])
+		if node["mode"] == _BYPASSED:
+			return self._bypass(key, kwargs)
+
+		cls = self.mappings[node["type"]]
+		try:
+			result = getattr(cls(), cls.FUNCTION)(**kwargs)
+		except Exception as e:
+			# Nodes that need a real model fail on stub inputs; downstream nodes get synthetic outputs instead
+			self.errors[key] = f"{type(e).__name__}: {e}"
+			return self._stub_outputs(node)
+		if isinstance(result, dict):
+			result = result.get("result") or ()
+		return list(result)
+
+
+	def run(self, profile: bool = False) -> Dict[str, Any]:
+		"""
+		Runs the graph once. Stub producers are evaluated before the clock starts.
+
+		Args:
+		    profile: Also measure the peak memory of each node. Slower, so keep it out of timed runs.
+
+		Returns:
+		    Dict[str, Any]: Total seconds, seconds per node and, when profiling, peak RSS increase per node.
+		"""
+		values: Dict[str, List[Any]] = {
+			key: self._stub_outputs(self.flat[key]) for key in self.order if self.flat[key]["type"] not in self.mappings
+		}
+		seconds: Dict[str, float] = {}
+		peaks: Dict[str, int] = {}
+		bytes_out: Dict[str, int] = {}
+
+		start = time.perf_counter()
+		for key in self.executed:
+			kwargs = self._kwargs(key, values)
+			node_start = time.perf_counter()
+			if profile:
+				with PeakMemory() as peak:
+					values[key] = self._execute(key, kwargs)
+				peaks[key] = peak.peak_bytes
+				bytes_out[key] = value_nbytes(values[key])
+			else:
+				values[key] = self._execute(key, kwargs)
+			seconds[key] = time.perf_counter() - node_start
+		return {"total_s": time.perf_counter() - start, "nodes": seconds, "peak_rss_bytes": peaks, "bytes_out": bytes_out}
+
+
+def replay_workflow(
+	workflow: Dict[str, Any], mappings: Dict[str, type], runs: int = 5, warmup: int = 1,
+	batch: int = 1, side: int = 512, copies: int = 1) -> Dict[str, Any]:
+	"""
+	Replays a workflow runs times after warmup runs and aggregates the timings.
+
+	Returns:
+	    Dict[str, Any]: {"meta", "replay": end-to-end statistics, "nodes": per-node statistics, "errors"}.
+	"""
+	replay = Replay(replicate(flatten_workflow(workflow), copies), mappings, batch, side)
+	for _ in range(warmup):
+		replay.run()
+	timed = [replay.run() for _ in range(max(1, runs))]
+
+	tracemalloc.start()
+	try:
+		with PeakMemory() as peak:
+			profiled = replay.run(profile = True)
+		peak_py = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	totals = [run["total_s"] for run in timed]
+	median = statistics.median(totals)
+	nodes = {}
+	for key in replay.executed:
+		samples = [run["nodes"][key] for run in timed]
+		node = replay.flat[key]
+		nodes[key] = {
+			"type": node["type"],
+			"status": "muted" if node["mode"] == _MUTED else "bypassed" if node["mode"] == _BYPASSED else
+			"stubbed" if key in replay.errors else "ok",
+			"median_s": statistics.median(samples),
+			"max_s": max(samples),
+			"bytes_out": profiled["bytes_out"][key],
+			"peak_rss_bytes": profiled["peak_rss_bytes"][key],
+		}
+
+	return {
+		"meta": {**environment(), "runs": len(timed), "warmup": warmup, "batch": batch, "side": side, "copies": copies},
+		"replay": {
+			"nodes": len(replay.executed),
+			"stub_producers": len(replay.order) - len(replay.executed),
+			"median_s": median,
+			"min_s": min(totals),
+			"replays_per_s": 1 / median if median else None,
+			"nodes_per_s": len(replay.executed) / median if median else None,
+			"peak_rss_bytes": peak.peak_bytes,
+			"peak_py_bytes": peak_py,
+		},
+		"nodes": dict(sorted(nodes.items(), key = lambda item: item[1]["median_s"], reverse = True)),
+		"errors": dict(replay.errors),
+	}
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+	for key, node in report["nodes"].items():
+		print(
+			f"{key:<16} {node['type']:<28} {node['median_s'] * 1e6:>12.1f} us  "
+			f"peak {node['peak_rss_bytes'] / 1024 ** 2:>8.2f} MiB  out {node['bytes_out'] / 1024 ** 2:>8.2f} MiB  {node['status']}"
+		)
+	for key, error in report["errors"].items():
+		print(f"{key}: stubbed after {error}", file = sys.stderr)
+	r = report["replay"]
+	print(
+		f"{r['nodes']} nodes ({r['stub_producers']} stub producers): {r['median_s'] * 1e3:.2f} ms per replay, "
+		f"{r['replays_per_s']:.1f} replays/s, {r['nodes_per_s']:.0f} nodes/s, peak RSS +{r['peak_rss_bytes'] / 1024 ** 2:.1f} MiB"
+	)
+
+
+def main(argv = None) -> int:
+	parser = argparse.ArgumentParser(prog = "python -m benchmarks.replay", description = "Replay the Tojioo nodes of a workflow.")
+	parser.add_argument("workflow", type = Path, help = "workflow JSON saved from the ComfyUI frontend")
+	parser.add_argument("--runs", type = int, default = 5, help = "timed replays (default 5)")
+	parser.add_argument("--warmup", type = int, default = 1, help = "untimed replays before measuring (default 1)")
+	parser.add_argument("--batch", type = int, default = 1, help = "batch size of synthetic tensors (default 1)")
+	parser.add_argument("--side", type = int, default = 512, help = "width and height of synthetic images (default 512)")
+	parser.add_argument("--copies", type = int, default = 1, help = "replay this many copies of the graph at once (default 1)")
+	parser.add_argument("--output", type = Path, help = "write the report as JSON to this file")
+	args = parser.parse_args(argv)
+
+	import folder_paths
+
+	from python import NODE_CLASS_MAPPINGS
+
+	with open(args.workflow, "r", encoding = "utf-8") as f:
+		workflow = json.load(f)
+
+	with tempfile.TemporaryDirectory(prefix = "tojioo_replay_") as workdir:
+		if hasattr(folder_paths.get_save_image_path, "return_value"):
+			folder_paths.get_save_image_path.return_value = (workdir, "preview", 0, "", "")
+		report = replay_workflow(
+			workflow, NODE_CLASS_MAPPINGS, args.runs, args.warmup, args.batch, args.side, args.copies
+		)
+	report["meta"]["workflow"] = str(args.workflow)
+
+	_print_report(report)
+	if args.output:
+		save_results(report, args.output)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
\ No newline at end of file
@@ -6,6 +6,9 @@
 
 from typing import Dict, Any
 
+from .config import settings
+from .utils.edge_tracer import install_edge_tracer
+from .utils.node_profiler import install_node_profiler, register_routes
 from .utils.wsl_patch import apply_wsl_safetensors_patch
 
 from .controllers.passthrough_controller import PassthroughController
@@ -17,7 +20,9 @@ from .nodes.dynamic_passthrough import PT_DynamicPassthrough
 from .nodes.dynamic_preview import PT_DynamicPreview
 from .nodes.multi_pass import PT_MultiPass
 from .nodes.dual_clip_encode import PT_DualCLIPEncode
+from .nodes.batch_clip_encode import PT_BatchCLIPEncode
 from .nodes.tiled_vae_settings import PT_TiledVAESettings
+from .nodes.tiled_vae_calibration import PT_TiledVAECalibrate
 
 
 apply_wsl_safetensors_patch()
@@ -32,9 +37,20 @@ NODE_CLASS_MAPPINGS: Dict[str, Any] = {
 	"PT_DynamicPreview": PT_DynamicPreview,
 	"PT_MultiPass": PT_MultiPass,
 	"PT_DualCLIPEncode": PT_DualCLIPEncode,
+	"PT_BatchCLIPEncode": PT_BatchCLIPEncode,
 	"PT_TiledVAESettings": PT_TiledVAESettings,
+	"PT_TiledVAECalibrate": PT_TiledVAECalibrate,
 }
 
+if settings.PROFILE_NODES:
+	install_node_profiler(NODE_CLASS_MAPPINGS)
+
+if settings.TRACE_EDGES:
+	install_edge_tracer(NODE_CLASS_MAPPINGS)
+
+if settings.PROFILE_NODES or settings.TRACE_EDGES:
+	register_routes()
+
 NODE_DISPLAY_NAME_MAPPINGS = {
 	k: v.NODE_NAME for k, v in NODE_CLASS_MAPPINGS.items()
 }
\ No newline at end of file
@@ -0,0 +1,72 @@
+﻿import os
+
+
+def _env_str(name: str, default: str) -> str:
+	value = os.environ.get(name)
+	if value is None or not value.strip():
+		return default
+	return value.strip().lower()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+	value = os.environ.get(name)
+	if value is None or not value.strip():
+		return default
+	return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+def _env_int(name: str, default: int) -> int:
+	try:
+		return int(os.environ.get(name, default))
+	except ValueError:
+		return default
+
+
+# Preview delivery: "temp" writes files to the temp directory, "websocket" streams encoded frames to the client
+PREVIEW_TRANSPORT = _env_str("TOJIOO_PREVIEW_TRANSPORT", "temp")
+
+# Number of previously written preview frames remembered for reuse (0 disables)
+PREVIEW_CACHE_SIZE = _env_int("TOJIOO_PREVIEW_CACHE_SIZE", 256)
+
+# Embed the prompt and workflow into temp preview PNGs
+PREVIEW_METADATA = _env_bool("TOJIOO_PREVIEW_METADATA", True)
+
+# Encode and write temp previews on a background worker; the queue bounds how many frames may be pending
+PREVIEW_ASYNC = _env_bool("TOJIOO_PREVIEW_ASYNC", False)
+PREVIEW_ASYNC_QUEUE = _env_int("TOJIOO_PREVIEW_ASYNC_QUEUE", 64)
+
+# Byte budget of the process-wide text conditioning cache in MiB (0 disables)
+COND_CACHE_MB = _env_int("TOJIOO_COND_CACHE_MB", 256)
+
+# Persist encoded conditioning under the user directory so it survives restarts; the budget is in MiB
+COND_DISK_CACHE = _env_bool("TOJIOO_COND_DISK_CACHE", False)
+COND_DISK_CACHE_MB = _env_int("TOJIOO_COND_DISK_CACHE_MB", 2048)
+
+# Memory one tile may use when Tiled VAE Settings runs in auto mode, in MiB (0 uses half of the available RAM)
+TILED_VAE_BUDGET_MB = _env_int("TOJIOO_TILED_VAE_BUDGET_MB", 0)
+
+# How the safetensors patch reads CPU loads: "auto" decides per mount, "native" keeps safetensors' own loader,
+# "bulk" copies out of a memory map, "parallel" issues concurrent ranged reads
+LOADER_STRATEGY = _env_str("TOJIOO_LOADER_STRATEGY", "auto")
+LOADER_WORKERS = _env_int("TOJIOO_LOADER_WORKERS", 8)
+LOADER_CHUNK_MB = _env_int("TOJIOO_LOADER_CHUNK_MB", 16)
+
+# Return state dicts that read each tensor on first access instead of loading the whole file
+LOADER_LAZY = _env_bool("TOJIOO_LOADER_LAZY", False)
+
+# Byte budget in MiB for keeping recently loaded CPU state dicts in RAM (0 disables); cached tensors are shared
+LOADER_CACHE_MB = _env_int("TOJIOO_LOADER_CACHE_MB", 0)
+
+# Records kept per metric in the in-process metrics registry
+METRICS_CAPACITY = _env_int("TOJIOO_METRICS_CAPACITY", 1024)
+
+# Record wall/CPU time, tensor bytes and peak memory of every node call in the metrics registry
+PROFILE_NODES = _env_bool("TOJIOO_PROFILE_NODES", False)
+
+# Record type, shape, dtype, device and size of every value forwarded by a routing node
+TRACE_EDGES = _env_bool("TOJIOO_TRACE_EDGES", False)
+# Traced edges kept per prompt; the most recent prompts each get their own buffer
+EDGE_TRACE_CAPACITY = _env_int("TOJIOO_EDGE_TRACE_CAPACITY", 16384)
+
+# Level of the package logger: debug, info, warning, error or critical
+LOG_LEVEL = _env_str("TOJIOO_LOG_LEVEL", "info")
\ No newline at end of file
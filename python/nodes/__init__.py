@@ -12,7 +12,9 @@ from .dynamic_passthrough import PT_DynamicPassthrough
 from .dynamic_preview import PT_DynamicPreview
 from .multi_pass import PT_MultiPass
 from .dual_clip_encode import PT_DualCLIPEncode
+from .batch_clip_encode import PT_BatchCLIPEncode
 from .tiled_vae_settings import PT_TiledVAESettings
+from .tiled_vae_calibration import PT_TiledVAECalibrate
 
 
 __all__ = [
@@ -26,5 +28,7 @@ __all__ = [
 	"PT_DynamicPreview",
 	"PT_MultiPass",
 	"PT_DualCLIPEncode",
+	"PT_BatchCLIPEncode",
 	"PT_TiledVAESettings",
+	"PT_TiledVAECalibrate",
 ]
\ No newline at end of file
@@ -0,0 +1,106 @@
+﻿import os
+from typing import List
+
+from .base import BaseNode
+from .dual_clip_encode import PT_DualCLIPEncode
+from ..config.categories import CATEGORIES
+from ..config.types import COMFY_TYPES
+
+
+class PT_BatchCLIPEncode(BaseNode):
+	"""Encodes many prompts with one CLIP model, outputting a list of conditioning in prompt order."""
+	NODE_NAME = "Batch CLIP Text Encode"
+	DESCRIPTION = "Encodes one prompt per line (from the text box and/or a text file) into a list of conditioning."
+
+
+	@classmethod
+	def INPUT_TYPES(cls):
+		return {
+			"required": {
+				"clip": (COMFY_TYPES["clip"],),
+				"prompts": (COMFY_TYPES["text"], {
+					"multiline": True,
+					"dynamicPrompts": True,
+					"tooltip": "One prompt per line; empty lines are skipped",
+				}),
+				"progress_interval": ("INT", {
+					"default": 8,
+					"min": 1,
+					"max": 256,
+					"step": 1,
+					"display": "number",
+					"tooltip": "Prompts encoded between progress updates and interruption checks",
+				}),
+			},
+			"optional": {
+				"prompts_file": (COMFY_TYPES["text"], {
+					"default": "",
+					"tooltip": "UTF-8 text file with one prompt per line, appended after the text box prompts. Relative to the ComfyUI input directory; files outside the input and user directories are rejected",
+				}),
+			},
+		}
+
+
+	RETURN_TYPES = (COMFY_TYPES["conditioning"], COMFY_TYPES["text"])
+	RETURN_NAMES = ("conditioning", "prompts")
+	OUTPUT_IS_LIST = (True, True)
+	CATEGORY = CATEGORIES["other"]
+
+
+	@staticmethod
+	def run(clip, prompts, progress_interval = 8, prompts_file = ""):
+		"""Encodes every distinct prompt once and returns the results in the original order"""
+		if clip is None:
+			raise RuntimeError("clip input is invalid: None")
+
+		texts = PT_BatchCLIPEncode._read_prompts(prompts, prompts_file)
+		if not texts:
+			raise ValueError("No prompts to encode: enter one prompt per line or set prompts_file.")
+
+		import comfy.model_management
+		import comfy.utils
+
+		unique = list(dict.fromkeys(texts))
+		progress = comfy.utils.ProgressBar(len(unique))
+		encoded = {}
+		step = max(1, progress_interval)
+		for start in range(0, len(unique), step):
+			comfy.model_management.throw_exception_if_processing_interrupted()
+			batch = unique[start:start + step]
+			for text in batch:
+				encoded[text] = PT_DualCLIPEncode._encode(clip, text)
+			progress.update(len(batch))
+
+		return ([encoded[text] for text in texts], texts)
+
+
+	@staticmethod
+	def _read_prompts(prompts: str, prompts_file: str) -> List[str]:
+		lines = (prompts or "").splitlines()
+		if prompts_file and prompts_file.strip():
+			with open(PT_BatchCLIPEncode._resolve_prompts_file(prompts_file), "r", encoding = "utf-8") as f:
+				lines.extend(f.read().splitlines())
+		return [line.strip() for line in lines if line.strip()]
+
+
+	@staticmethod
+	def _resolve_prompts_file(name: str) -> str:
+		"""Resolves name against the input directory, then the user directory; anything outside both is rejected."""
+		import folder_paths
+
+		name = name.strip().strip('"')
+		roots = [folder_paths.get_input_directory()]
+		if hasattr(folder_paths, "get_user_directory"):
+			roots.append(folder_paths.get_user_directory())
+
+		for root in roots:
+			root = os.path.realpath(root)
+			path = os.path.realpath(os.path.join(root, name))
+			try:
+				inside = os.path.commonpath([root, path]) == root
+			except ValueError:
+				# Paths on different Windows drives have no common path
+				inside = False
+			if inside and os.path.isfile(path):
+				return path
+		raise ValueError(f"prompts_file '{name}' is not a file inside the ComfyUI input or user directory.")
\ No newline at end of file
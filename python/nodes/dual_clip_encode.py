@@ -1,6 +1,9 @@
 ﻿from .base import BaseNode
+from ..config import settings
 from ..config.categories import CATEGORIES
 from ..config.types import COMFY_TYPES
+from ..utils.conditioning_cache import CONDITIONING_CACHE, clip_fingerprint, clip_identity
+from ..utils.conditioning_disk_cache import CONDITIONING_DISK_CACHE
 
 
 class PT_DualCLIPEncode(BaseNode):
@@ -37,10 +40,34 @@ class PT_DualCLIPEncode(BaseNode):
 				+ "If the clip is from a checkpoint loader node, your checkpoint does not contain a valid clip or text encoder model."
 			)
 
-		positive_tokens = clip.tokenize(positive)
-		negative_tokens = clip.tokenize(negative)
+		positive_cond = PT_DualCLIPEncode._encode(clip, positive)
 
-		positive_cond = clip.encode_from_tokens_scheduled(positive_tokens)
-		negative_cond = clip.encode_from_tokens_scheduled(negative_tokens)
+		# Identical prompts share a single text encoder pass
+		if negative == positive:
+			return (positive_cond, positive_cond)
 
-		return (positive_cond, negative_cond)
\ No newline at end of file
+		negative_cond = PT_DualCLIPEncode._encode(clip, negative)
+
+		return (positive_cond, negative_cond)
+
+
+	@staticmethod
+	def _encode(clip, text):
+		identity = clip_identity(clip)
+		key = (identity, text) if identity is not None else None
+		if key is not None:
+			cached = CONDITIONING_CACHE.get(key, clip.cond_stage_model)
+			if cached is not None:
+				return cached
+
+		fingerprint = clip_fingerprint(clip) if key is not None and settings.COND_DISK_CACHE else None
+		cond = CONDITIONING_DISK_CACHE.get(fingerprint, text) if fingerprint is not None else None
+
+		if cond is None:
+			cond = clip.encode_from_tokens_scheduled(clip.tokenize(text))
+			if fingerprint is not None:
+				CONDITIONING_DISK_CACHE.put(fingerprint, text, cond)
+
+		if key is not None:
+			CONDITIONING_CACHE.put(key, cond, clip.cond_stage_model)
+		return cond
\ No newline at end of file
@@ -1,11 +1,13 @@
-﻿import json
-import os
-
-import folder_paths
-
-from .base import AnyType, FlexibleOptionalInputType
+﻿from .base import AnyType, FlexibleOptionalInputType
 from ..config.categories import CATEGORIES
+from ..utils.latent_preview import latent_format_of, latent_to_rgb
+from ..utils.logger_internal import get_logger
+from ..utils.preview_transport import create_preview_transport
+from ..utils.tensor_stats import format_tensor_stats, tensor_stats
+from ..utils.text_format import format_value
+
 
+logger = get_logger(__name__)
 
 any_type = AnyType("*")
 
@@ -41,9 +43,8 @@ class PT_DynamicPreview:
 	def preview_images(self, prompt = None, extra_pnginfo = None, **kwargs):
 		import numpy as np
 		from PIL import Image
-		from PIL.PngImagePlugin import PngInfo
 
-		print("PT_DynamicPreview executing", list(kwargs.keys()))
+		logger.debug("PT_DynamicPreview executing with inputs %s", list(kwargs))
 
 		try:
 			import torch
@@ -52,38 +53,36 @@ class PT_DynamicPreview:
 
 		all_images = []
 		all_text = []
-		output_dir = folder_paths.get_temp_directory()
-		prefix = "preview_"
+		transport = create_preview_transport(prompt, extra_pnginfo)
+		# A MODEL connected to another slot tells which latent2rgb factors fit the latents
+		latent_format = next((f for f in map(latent_format_of, kwargs.values()) if f is not None), None)
 
 
 		def save_tensor_as_image(img_t, slot_idx):
+			key = transport.fingerprint(img_t)
+			cached = transport.reuse(key, slot_idx)
+			if cached is not None:
+				all_images.append(cached)
+				return
+
 			if img_t.shape[-1] not in (1, 3, 4) and img_t.shape[0] in (1, 3, 4):
 				img_t = img_t.permute(1, 2, 0)
 			i = 255.0 * img_t.detach().cpu().numpy()
 			img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
+			all_images.append(transport.send(img, slot_idx, key))
+
 
-			metadata = PngInfo()
-			if prompt is not None:
-				metadata.add_text("prompt", json.dumps(prompt))
-			if extra_pnginfo is not None:
-				for k, v in extra_pnginfo.items():
-					metadata.add_text(k, json.dumps(v))
-
-			full_output_folder, filename, counter, subfolder, _ = folder_paths.get_save_image_path(
-				prefix, output_dir, img.width, img.height
-			)
-			filename_with_counter = f"{filename}_{counter:05}_.png"
-			filepath = os.path.join(full_output_folder, filename_with_counter)
-			img.save(filepath, pnginfo = metadata, compress_level = 4)
-
-			all_images.append(
-				{
-					"filename": filename_with_counter,
-					"subfolder": subfolder,
-					"type": "temp",
-					"slot": slot_idx,
-				}
-			)
+		def save_masks_as_images(masks, slot_idx):
+			keys = [transport.fingerprint(mask) for mask in masks]
+			pixels = None
+			for i, key in enumerate(keys):
+				cached = transport.reuse(key, slot_idx)
+				if cached is not None:
+					all_images.append(cached)
+					continue
+				if pixels is None:
+					pixels = self._masks_to_uint8(masks, np)
+				all_images.append(transport.send(Image.fromarray(pixels[i]), slot_idx, key))
 
 
 		for slot_idx, (key, value) in enumerate(
@@ -100,10 +99,20 @@ class PT_DynamicPreview:
 					continue
 
 				if self._is_mask_tensor(value):
-					for frame in self._iter_mask_as_rgb(value):
-						save_tensor_as_image(frame, slot_idx)
+					save_masks_as_images(value.unsqueeze(0) if value.dim() == 2 else value, slot_idx)
 					continue
 
+			if torch is not None and isinstance(value, dict) and isinstance(value.get("samples"), torch.Tensor):
+				frames = latent_to_rgb(value["samples"], latent_format)
+				if frames is not None:
+					for frame in frames:
+						save_tensor_as_image(frame, slot_idx)
+
+			stats_entry = self._tensor_stats_entry(value, torch)
+			if stats_entry is not None:
+				all_text.append({"slot": slot_idx, **stats_entry})
+				continue
+
 			all_text.append({"slot": slot_idx, "text": self._value_to_text(value, torch)})
 
 		return {"ui": {"preview_data": all_images, "text_data": all_text}}
@@ -141,12 +150,28 @@ class PT_DynamicPreview:
 
 
 	@staticmethod
-	def _iter_mask_as_rgb(v):
-		if v.dim() == 2:
-			yield v.unsqueeze(-1).expand(-1, -1, 3)
-		elif v.dim() == 3:
-			for i in range(v.shape[0]):
-				yield v[i].unsqueeze(-1).expand(-1, -1, 3)
+	def _masks_to_uint8(masks, np):
+		"""Converts a [B, H, W] mask batch to 8-bit grayscale in one pass."""
+		return np.clip(255.0 * masks.detach().cpu().numpy(), 0, 255).astype(np.uint8)
+
+
+	@staticmethod
+	def _tensor_stats_entry(value, torch):
+		"""Returns a text entry with statistics and a structured stats payload for tensors and LATENT dicts."""
+		if torch is None:
+			return None
+
+		label = "Tensor"
+		if isinstance(value, dict) and isinstance(value.get("samples"), torch.Tensor):
+			label, value = "LATENT", value["samples"]
+		if not isinstance(value, torch.Tensor):
+			return None
+
+		try:
+			stats = tensor_stats(value)
+		except Exception:
+			return None
+		return {"text": format_tensor_stats(stats, label), "stats": stats}
 
 
 	@staticmethod
@@ -154,28 +179,21 @@ class PT_DynamicPreview:
 		if torch is not None and isinstance(value, torch.Tensor):
 			return f"Tensor: shape={list(value.shape)}, dtype={value.dtype}"
 
-		if isinstance(value, (list, tuple)):
-			if (
-				isinstance(value, list)
-				and len(value) > 0
-				and isinstance(value[0], (list, tuple))
-				and len(value[0]) == 2
-				and torch is not None
-				and isinstance(value[0][0], torch.Tensor)
-			):
-				shapes = [list(e[0].shape) for e in value if isinstance(e[0], torch.Tensor)]
-				return f"CONDITIONING: {len(value)} entries\nShapes: {shapes}"
+		if (
+			isinstance(value, list)
+			and len(value) > 0
+			and isinstance(value[0], (list, tuple))
+			and len(value[0]) == 2
+			and torch is not None
+			and isinstance(value[0][0], torch.Tensor)
+		):
+			shapes = [list(e[0].shape) for e in value if isinstance(e[0], torch.Tensor)]
+			return f"CONDITIONING: {len(value)} entries\nShapes: {shapes}"
+
+		if isinstance(value, (list, tuple, dict)):
+			return format_value(value, _MAX_TEXT_LEN)
 
-			try:
-				text = json.dumps(value, indent = 2, default = str)
-			except Exception:
-				text = repr(value)
-		elif isinstance(value, dict):
-			try:
-				text = json.dumps(value, indent = 2, default = str)
-			except Exception:
-				text = repr(value)
-		elif isinstance(value, (int, float, bool, str)):
+		if isinstance(value, (int, float, bool, str)):
 			text = str(value)
 		else:
 			text = repr(value)
@@ -0,0 +1,53 @@
+﻿from .base import BaseNode
+from ..config.categories import CATEGORIES
+from ..utils.tile_calibration import calibrate
+
+
+class PT_TiledVAECalibrate(BaseNode):
+	NODE_NAME = "Tiled VAE Calibrate"
+	DESCRIPTION = "Benchmarks tiled VAE decoding for a resolution and stores the best settings for Tiled VAE Settings auto mode."
+
+
+	@classmethod
+	def INPUT_TYPES(cls):
+		return {
+			"required": {
+				"vae": ("VAE",),
+				"width": ("INT", {
+					"default": 1024,
+					"min": 64,
+					"max": 16384,
+					"step": 8,
+					"display": "number",
+					"tooltip": "Output width to calibrate for",
+				}),
+				"height": ("INT", {
+					"default": 1024,
+					"min": 64,
+					"max": 16384,
+					"step": 8,
+					"display": "number",
+					"tooltip": "Output height to calibrate for",
+				}),
+				"frames": ("INT", {
+					"default": 1,
+					"min": 1,
+					"max": 4096,
+					"step": 1,
+					"display": "number",
+					"tooltip": "Output frame count (video VAEs only)",
+				}),
+			}
+		}
+
+
+	RETURN_TYPES = ("INT", "INT", "INT", "INT",)
+	RETURN_NAMES = ("tile_size", "overlap", "temporal_size", "temporal_overlap",)
+	OUTPUT_NODE = True
+	CATEGORY = CATEGORIES["other"]
+
+
+	@staticmethod
+	def run(vae, width, height, frames):
+		best = calibrate(vae, height, width, frames)
+		return best["tile_size"], best["overlap"], best["temporal_size"], best["temporal_overlap"],
\ No newline at end of file
@@ -1,5 +1,7 @@
 ﻿from .base import BaseNode
 from ..config.categories import CATEGORIES
+from ..utils.tile_calibration import lookup
+from ..utils.tile_planner import output_size, plan_tiles
 
 
 class PT_TiledVAESettings(BaseNode):
@@ -43,7 +45,16 @@ class PT_TiledVAESettings(BaseNode):
 					"display": "number",
 					"tooltip": "Overlap between temporal tiles in frames",
 				}),
-			}
+			},
+			"optional": {
+				"mode": (["manual", "auto"], {
+					"default": "manual",
+					"tooltip": "auto picks the settings from the connected image or latent and the available system memory",
+				}),
+				"image": ("IMAGE", {"tooltip": "Image (or video frames) to size the tiles for in auto mode"}),
+				"latent": ("LATENT", {"tooltip": "Latent to size the tiles for in auto mode"}),
+				"vae": ("VAE", {"tooltip": "Uses the settings measured by Tiled VAE Calibrate for this VAE in auto mode, when available"}),
+			},
 		}
 
 
@@ -53,5 +64,14 @@ class PT_TiledVAESettings(BaseNode):
 
 
 	@staticmethod
-	def run(tile_size, overlap, temporal_size, temporal_overlap):
-		return tile_size, overlap, temporal_size, temporal_overlap,
\ No newline at end of file
+	def run(tile_size, overlap, temporal_size, temporal_overlap, mode = "manual", image = None, latent = None, vae = None):
+		size = output_size(image, latent, vae) if mode == "auto" else None
+		if size is None:
+			return tile_size, overlap, temporal_size, temporal_overlap,
+
+		height, width, frames = size
+		plan = (lookup(vae, height, width, frames) if vae is not None else None) or plan_tiles(height, width, frames)
+		if frames <= 1:
+			# Temporal settings only apply to video VAEs
+			return plan["tile_size"], plan["overlap"], temporal_size, temporal_overlap,
+		return plan["tile_size"], plan["overlap"], plan["temporal_size"], plan["temporal_overlap"],
\ No newline at end of file
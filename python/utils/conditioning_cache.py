@@ -0,0 +1,219 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Process-wide cache of encoded text conditioning, keyed by CLIP model identity and prompt text.
+Entries are evicted least-recently-used first once their tensors exceed the byte budget. Nothing is
+invalidated explicitly: a new LoRA or output layer changes the key, and an entry whose encoder was
+garbage-collected is dropped when its id() is reused by another model.
+"""
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ..config import settings
+
+
+def conditioning_nbytes(value: Any) -> int:
+	"""Sums the storage of every tensor inside a CONDITIONING structure."""
+	if hasattr(value, "element_size") and hasattr(value, "numel"):
+		return value.element_size() * value.numel()
+	if isinstance(value, dict):
+		return sum(conditioning_nbytes(v) for v in value.values())
+	if isinstance(value, (list, tuple)):
+		return sum(conditioning_nbytes(v) for v in value)
+	return 0
+
+
+def clip_identity(clip) -> Optional[Tuple[Any, ...]]:
+	"""
+	Identifies the effective text encoder behind a CLIP object.
+
+	Covers the encoder module, its applied patches (LoRA and similar, tracked by the patcher's patches_uuid),
+	the selected output layer and tokenizer options. Returns None when the CLIP cannot be identified or
+	carries hooks that make its encoding schedule-dependent.
+	"""
+	model = getattr(clip, "cond_stage_model", None)
+	if model is None:
+		return None
+
+	patcher = getattr(clip, "patcher", None)
+	if getattr(patcher, "forced_hooks", None):
+		return None
+
+	tokenizer_options = getattr(clip, "tokenizer_options", None) or {}
+	return (
+		type(model).__name__,
+		id(model),
+		str(getattr(patcher, "patches_uuid", "")),
+		getattr(clip, "layer_idx", None),
+		repr(sorted(tokenizer_options.items())),
+	)
+
+
+_FINGERPRINT_MEMO_SIZE = 32
+_fingerprints: "OrderedDict[tuple, str]" = OrderedDict()
+_fingerprint_lock = threading.Lock()
+
+
+def _hash_tensor(h, t) -> None:
+	"""Feeds the raw bytes of a tensor into a hashlib object, the same on every device."""
+	import torch
+
+	data = t.detach()
+	if data.device.type != "cpu":
+		data = data.cpu()
+	h.update(data.contiguous().reshape(-1).view(torch.uint8).numpy())
+
+
+def hash_state_dict(h, state) -> None:
+	"""Feeds every weight name, shape, dtype and value into a hashlib object."""
+	for name in state:
+		t = state[name]
+		h.update(f"{name}:{tuple(t.shape)}:{t.dtype};".encode())
+		_hash_tensor(h, t)
+
+
+def _hash_value(h, value, depth: int = 0) -> None:
+	if depth > 6:
+		return
+	if hasattr(value, "shape") and hasattr(value, "dtype"):
+		h.update(f"{tuple(value.shape)}:{value.dtype}:".encode())
+		_hash_tensor(h, value)
+	elif isinstance(value, (list, tuple)):
+		for item in value:
+			_hash_value(h, item, depth + 1)
+	elif isinstance(value, dict):
+		for k in sorted(value, key = str):
+			h.update(str(k).encode())
+			_hash_value(h, value[k], depth + 1)
+	elif value is None or isinstance(value, (str, int, float, bool)):
+		h.update(repr(value).encode())
+	else:
+		# Patch adapters (LoRA and similar) keep their tensors in .weights
+		h.update(type(value).__name__.encode())
+		if hasattr(value, "weights"):
+			_hash_value(h, value.weights, depth + 1)
+
+
+def clip_fingerprint(clip) -> Optional[str]:
+	"""
+	Builds a digest of the text encoder that is stable across processes.
+
+	Hashes every weight name, shape, dtype and value and the applied patches with their strengths, so merges
+	and partial finetunes never share a key. The result is memoized per clip_identity, so the weights are
+	hashed once per loaded model.
+	"""
+	identity = clip_identity(clip)
+	if identity is None:
+		return None
+
+	with _fingerprint_lock:
+		digest = _fingerprints.get(identity)
+		if digest is not None:
+			_fingerprints.move_to_end(identity)
+			return digest
+
+	try:
+		h = hashlib.blake2b(digest_size = 20)
+		# Class, output layer and tokenizer options; id() and patches_uuid only hold within one process
+		h.update(repr((identity[0], identity[3], identity[4])).encode())
+		hash_state_dict(h, clip.cond_stage_model.state_dict())
+		patches = getattr(getattr(clip, "patcher", None), "patches", None) or {}
+		_hash_value(h, patches)
+		digest = h.hexdigest()
+	except Exception:
+		return None
+
+	with _fingerprint_lock:
+		_fingerprints[identity] = digest
+		while len(_fingerprints) > _FINGERPRINT_MEMO_SIZE:
+			_fingerprints.popitem(last = False)
+	return digest
+
+
+class ConditioningCache:
+	"""Thread-safe LRU of conditioning results bounded by total tensor bytes."""
+
+
+	def __init__(self, max_bytes: int) -> None:
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+		self._bytes = 0
+		self._lock = threading.Lock()
+
+
+	@property
+	def nbytes(self) -> int:
+		return self._bytes
+
+
+	def get(self, key: Hashable, owner: Any = None) -> Optional[Any]:
+		"""
+		Returns the cached value for key, or None.
+
+		The owner is the object whose id() is part of the key; an entry recorded for a
+		different (garbage-collected) object that reused the same id is discarded.
+		"""
+		with self._lock:
+			item = self._entries.get(key)
+			if item is not None and owner is not None and item[2] is not None and item[2]() is not owner:
+				self._remove(key)
+				item = None
+			if item is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return item[0]
+
+
+	def put(self, key: Hashable, value: Any, owner: Any = None) -> None:
+		size = conditioning_nbytes(value)
+		if self.max_bytes <= 0 or size > self.max_bytes:
+			return
+
+		try:
+			owner_ref = weakref.ref(owner) if owner is not None else None
+		except TypeError:
+			owner_ref = None
+
+		with self._lock:
+			if key in self._entries:
+				self._remove(key)
+			self._entries[key] = (value, size, owner_ref)
+			self._bytes += size
+			while self._bytes > self.max_bytes and self._entries:
+				self._remove(next(iter(self._entries)))
+
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._bytes = 0
+			self.hits = 0
+			self.misses = 0
+
+
+	def stats(self) -> Dict[str, int]:
+		return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+	def _remove(self, key: Hashable) -> None:
+		_, size, _ = self._entries.pop(key)
+		self._bytes -= size
+
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+CONDITIONING_CACHE = ConditioningCache(settings.COND_CACHE_MB * 1024 * 1024)
\ No newline at end of file
@@ -0,0 +1,262 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Persistent tier of the conditioning cache.
+Each entry is a safetensors file named after the model fingerprint and prompt hash, with its
+CONDITIONING layout in the file metadata. A JSON index tracks sizes and last use for eviction; hits are
+written back to it at most every few seconds, merged with the stamps other processes wrote.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger_internal import get_logger
+from ..config import settings
+
+
+logger = get_logger(__name__)
+
+_INDEX_NAME = "index.json"
+_SUFFIX = ".safetensors"
+_SCALARS = (str, int, float, bool, type(None))
+# Minimum seconds between index writes caused by cache hits alone
+_INDEX_SAVE_INTERVAL = 10.0
+
+
+def _flatten(cond) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+	"""
+	Splits CONDITIONING ([[tensor, {options}], ...]) into named tensors and a JSON layout.
+	Returns None when an option holds a value that cannot be stored.
+	"""
+	if not isinstance(cond, list):
+		return None
+
+	tensors: Dict[str, Any] = {}
+	layout: List[Dict[str, Any]] = []
+	for i, item in enumerate(cond):
+		if not isinstance(item, (list, tuple)) or len(item) != 2 or not isinstance(item[1], dict):
+			return None
+		embedding, options = item
+		if not hasattr(embedding, "shape"):
+			return None
+		tensors[f"{i}.cond"] = embedding.detach().cpu().contiguous()
+		entry: Dict[str, Any] = {"tensors": [], "values": {}}
+		for key, value in options.items():
+			if hasattr(value, "shape") and hasattr(value, "dtype"):
+				tensors[f"{i}.{key}"] = value.detach().cpu().contiguous()
+				entry["tensors"].append(key)
+			elif isinstance(value, _SCALARS):
+				entry["values"][key] = value
+			else:
+				return None
+		layout.append(entry)
+	return tensors, layout
+
+
+class ConditioningDiskCache:
+	"""Byte-bounded on-disk store of conditioning, shared by every process using the same directory."""
+
+
+	def __init__(self, max_bytes: int, directory: Optional[str] = None) -> None:
+		self.max_bytes = max_bytes
+		self._directory = directory
+		self._index: Optional[Dict[str, Dict[str, Any]]] = None
+		self._dirty = False
+		self._saved_at = 0.0
+		self._lock = threading.Lock()
+
+
+	@property
+	def directory(self) -> str:
+		if self._directory is None:
+			import folder_paths
+
+			self._directory = os.path.join(folder_paths.get_user_directory(), "tojioo_passthrough", "conditioning")
+		return self._directory
+
+
+	@staticmethod
+	def entry_name(model_fingerprint: str, text: str) -> str:
+		h = hashlib.blake2b(digest_size = 20)
+		h.update(model_fingerprint.encode())
+		h.update(b"\0")
+		h.update(text.encode("utf-8", "surrogatepass"))
+		return h.hexdigest() + _SUFFIX
+
+
+	def get(self, model_fingerprint: str, text: str) -> Optional[list]:
+		"""Loads an entry through a memory-mapped safetensors reader, or returns None."""
+		name = self.entry_name(model_fingerprint, text)
+		path = os.path.join(self.directory, name)
+		if not os.path.exists(path):
+			return None
+
+		try:
+			from safetensors import safe_open
+
+			with safe_open(path, framework = "pt", device = "cpu") as f:
+				metadata = f.metadata() or {}
+				if metadata.get("model") != model_fingerprint or metadata.get("text") != text:
+					return None
+				cond = []
+				for i, entry in enumerate(json.loads(metadata["layout"])):
+					options = dict(entry["values"])
+					for key in entry["tensors"]:
+						options[key] = f.get_tensor(f"{i}.{key}")
+					cond.append([f.get_tensor(f"{i}.cond"), options])
+		except Exception as e:
+			logger.warning("Discarding unreadable conditioning cache entry %s", name, exc_info = e)
+			self._discard(name)
+			return None
+
+		with self._lock:
+			index = self._load_index()
+			if name in index:
+				index[name]["used"] = time.time()
+				self._dirty = True
+				if time.monotonic() - self._saved_at >= _INDEX_SAVE_INTERVAL:
+					self._save_index(index)
+		return cond
+
+
+	def flush(self) -> None:
+		"""Writes last-use stamps of hits that are not in the index file yet."""
+		with self._lock:
+			if self._dirty and self._index is not None:
+				self._save_index(self._index)
+
+
+	def put(self, model_fingerprint: str, text: str, cond) -> None:
+		if self.max_bytes <= 0:
+			return
+		flat = _flatten(cond)
+		if flat is None:
+			return
+		tensors, layout = flat
+		size = sum(t.element_size() * t.numel() for t in tensors.values())
+		if size > self.max_bytes:
+			return
+
+		name = self.entry_name(model_fingerprint, text)
+		path = os.path.join(self.directory, name)
+		metadata = {"model": model_fingerprint, "text": text, "layout": json.dumps(layout)}
+		try:
+			from safetensors.torch import save_file
+
+			os.makedirs(self.directory, exist_ok = True)
+			# Write beside the target and rename, so readers in other processes never see a partial file
+			partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+			save_file(tensors, partial, metadata = metadata)
+			os.replace(partial, path)
+		except Exception as e:
+			logger.warning("Could not write conditioning cache entry", exc_info = e)
+			return
+
+		with self._lock:
+			index = self._load_index()
+			index[name] = {"bytes": os.path.getsize(path), "used": time.time()}
+			# Entries another process used recently must not be evicted by their stale stamps here
+			self._merge_saved_stamps(index)
+			self._evict(index)
+			self._save_index(index)
+
+
+	def clear(self) -> None:
+		with self._lock:
+			for name in list(self._load_index()):
+				self._remove_file(name)
+			self._index = {}
+			self._save_index(self._index)
+
+
+	def _load_index(self) -> Dict[str, Dict[str, Any]]:
+		if self._index is not None:
+			return self._index
+		index: Dict[str, Dict[str, Any]] = {}
+		try:
+			with open(os.path.join(self.directory, _INDEX_NAME), "r", encoding = "utf-8") as f:
+				index = json.load(f)
+		except (OSError, ValueError):
+			pass
+
+		# Pick up entries written by other processes and drop ones that no longer exist
+		try:
+			names = [n for n in os.listdir(self.directory) if n.endswith(_SUFFIX)]
+		except OSError:
+			names = []
+		for n in names:
+			if n not in index:
+				try:
+					stat = os.stat(os.path.join(self.directory, n))
+				except OSError:
+					continue
+				index[n] = {"bytes": stat.st_size, "used": stat.st_mtime}
+		self._index = {n: index[n] for n in names if n in index}
+		return self._index
+
+
+	def _merge_saved_stamps(self, index: Dict[str, Dict[str, Any]]) -> None:
+		"""Takes the later last-use stamp of each entry from the index file, which other processes also write."""
+		try:
+			with open(os.path.join(self.directory, _INDEX_NAME), "r", encoding = "utf-8") as f:
+				saved = json.load(f)
+		except (OSError, ValueError):
+			return
+		if not isinstance(saved, dict):
+			return
+		for name, entry in index.items():
+			other = saved.get(name)
+			used = other.get("used") if isinstance(other, dict) else None
+			if isinstance(used, (int, float)) and used > entry["used"]:
+				entry["used"] = used
+
+
+	def _save_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+		self._merge_saved_stamps(index)
+		path = os.path.join(self.directory, _INDEX_NAME)
+		partial = f"{path}.{os.getpid()}.tmp"
+		try:
+			os.makedirs(self.directory, exist_ok = True)
+			with open(partial, "w", encoding = "utf-8") as f:
+				json.dump(index, f)
+			os.replace(partial, path)
+		except OSError as e:
+			logger.warning("Could not write conditioning cache index", exc_info = e)
+			return
+		self._dirty = False
+		self._saved_at = time.monotonic()
+
+
+	def _evict(self, index: Dict[str, Dict[str, Any]]) -> None:
+		total = sum(entry["bytes"] for entry in index.values())
+		for name in sorted(index, key = lambda n: index[n]["used"]):
+			if total <= self.max_bytes:
+				break
+			total -= index.pop(name)["bytes"]
+			self._remove_file(name)
+
+
+	def _discard(self, name: str) -> None:
+		with self._lock:
+			self._load_index().pop(name, None)
+			self._remove_file(name)
+
+
+	def _remove_file(self, name: str) -> None:
+		try:
+			os.remove(os.path.join(self.directory, name))
+		except OSError:
+			pass
+
+
+CONDITIONING_DISK_CACHE = ConditioningDiskCache(settings.COND_DISK_CACHE_MB * 1024 * 1024)
+atexit.register(CONDITIONING_DISK_CACHE.flush)
\ No newline at end of file
@@ -0,0 +1,188 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Opt-in tracing of the values routing nodes forward.
+Every output of a passthrough, switch, bus or dynamic node is recorded with its type, shape, dtype, device
+and size, tagged with prompt, node and slot. Records are kept per prompt, apart from the metrics registry,
+so a large prompt neither overwrites its own first edges nor evicts other metrics.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .logger_internal import get_logger
+from .node_profiler import executing_context, value_nbytes, wrap_node_functions
+from ..config import settings
+from ..config.categories import CATEGORIES, MAIN_CATEGORY
+
+
+logger = get_logger(__name__)
+
+_WRAPPED = "_tojioo_traced"
+_ROUTING_CATEGORIES = {MAIN_CATEGORY} | {CATEGORIES[key] for key in ("simple", "widgets", "dynamic", "batch", "switch")}
+_KEPT_PROMPTS = 8
+
+
+class EdgeTraces:
+	"""Thread-safe edge records of the most recent prompts, each prompt in its own ring buffer of capacity records."""
+
+
+	def __init__(self, capacity: int, prompts: int = _KEPT_PROMPTS) -> None:
+		self.capacity = max(1, capacity)
+		self.prompts = max(1, prompts)
+		self._buffers: "OrderedDict[Any, Deque[Dict[str, Any]]]" = OrderedDict()
+		self._dropped: Dict[Any, int] = {}
+		self._lock = threading.Lock()
+
+
+	def record(self, prompt_id: Any, **fields: Any) -> Dict[str, Any]:
+		entry = {"time": time.time(), "prompt_id": prompt_id, **fields}
+		with self._lock:
+			buffer = self._buffers.get(prompt_id)
+			if buffer is None:
+				buffer = self._buffers[prompt_id] = deque(maxlen = self.capacity)
+				self._dropped[prompt_id] = 0
+				while len(self._buffers) > self.prompts:
+					evicted, _ = self._buffers.popitem(last = False)
+					self._dropped.pop(evicted, None)
+			if len(buffer) == self.capacity:
+				self._dropped[prompt_id] += 1
+			buffer.append(entry)
+		return entry
+
+
+	def latest_prompt(self) -> Any:
+		with self._lock:
+			return next(reversed(self._buffers), None)
+
+
+	def records(self, prompt_id: Any) -> List[Dict[str, Any]]:
+		with self._lock:
+			return [dict(entry) for entry in self._buffers.get(prompt_id, ())]
+
+
+	def dropped(self, prompt_id: Any) -> int:
+		"""Number of the prompt's earliest edges that no longer fit its buffer."""
+		with self._lock:
+			return self._dropped.get(prompt_id, 0)
+
+
+	def clear(self) -> None:
+		with self._lock:
+			self._buffers.clear()
+			self._dropped.clear()
+
+
+EDGE_TRACES = EdgeTraces(settings.EDGE_TRACE_CAPACITY)
+
+
+def _first_tensor(value: Any, depth: int = 0) -> Optional[Any]:
+	if hasattr(value, "shape") and hasattr(value, "dtype"):
+		return value
+	if depth >= 3:
+		return None
+	if isinstance(value, dict):
+		candidates = [value["samples"]] if "samples" in value else list(value.values())
+	elif isinstance(value, (list, tuple)):
+		candidates = list(value)
+	else:
+		return None
+	for candidate in candidates:
+		tensor = _first_tensor(candidate, depth + 1)
+		if tensor is not None:
+			return tensor
+	return None
+
+
+def describe_value(value: Any) -> Dict[str, Any]:
+	"""Python type, size in bytes and the shape, dtype and device of the first tensor inside the value."""
+	tensor = _first_tensor(value)
+	device = getattr(tensor, "device", None)
+	return {
+		"python_type": type(value).__name__,
+		"shape": list(tensor.shape) if tensor is not None else None,
+		"dtype": str(tensor.dtype) if tensor is not None else None,
+		"device": str(device) if device is not None else None,
+		"bytes": value_nbytes(value),
+	}
+
+
+def _traced(node_type: str, cls: type, fn: Callable) -> Callable:
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		result = fn(*args, **kwargs)
+		outputs = result.get("result") if isinstance(result, dict) else result
+		if isinstance(outputs, tuple):
+			context = executing_context()
+			return_types = getattr(cls, "RETURN_TYPES", ()) or ()
+			return_names = getattr(cls, "RETURN_NAMES", None) or return_types
+			for slot, value in enumerate(outputs):
+				if value is None:
+					continue
+				EDGE_TRACES.record(
+					**context,
+					node_type = node_type,
+					slot = slot,
+					slot_name = str(return_names[slot]) if slot < len(return_names) else None,
+					type = str(return_types[slot]) if slot < len(return_types) else None,
+					**describe_value(value),
+				)
+		return result
+
+
+	return wrapper
+
+
+def install_edge_tracer(mappings: Dict[str, type]) -> int:
+	"""Traces the outputs of every routing node class in a NODE_CLASS_MAPPINGS dict; returns the number wrapped."""
+	routing = {k: v for k, v in mappings.items() if getattr(v, "CATEGORY", None) in _ROUTING_CATEGORIES}
+	wrapped = wrap_node_functions(routing, _traced, _WRAPPED)
+	logger.debug("Edge tracer installed on %d node classes", wrapped)
+	return wrapped
+
+
+def edge_report(prompt_id: Optional[str] = None, top: int = 50, records: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+	"""
+	Ranks the traced edges of one prompt by size.
+
+	Args:
+	    prompt_id: The prompt to report on, defaults to the most recently traced one.
+	    top: Number of edges to include.
+	    records: Edge records, defaults to the traces kept for the prompt.
+
+	Returns:
+	    Dict[str, Any]: The prompt id, edge count, edges dropped from a full buffer, total bytes, the heaviest edges
+	    and bytes forwarded per node.
+	"""
+	dropped = 0
+	if records is None:
+		if prompt_id is None:
+			prompt_id = EDGE_TRACES.latest_prompt()
+		records = EDGE_TRACES.records(prompt_id)
+		dropped = EDGE_TRACES.dropped(prompt_id)
+	if prompt_id is None and records:
+		prompt_id = records[-1].get("prompt_id")
+	edges = [r for r in records if r.get("prompt_id") == prompt_id]
+
+	per_node: Dict[str, Dict[str, Any]] = {}
+	for r in edges:
+		key = str(r.get("node_id") if r.get("node_id") is not None else r["node_type"])
+		node = per_node.setdefault(key, {"node_type": r["node_type"], "edges": 0, "bytes": 0})
+		node["edges"] += 1
+		node["bytes"] += r["bytes"]
+
+	return {
+		"prompt_id": prompt_id,
+		"edges": len(edges),
+		"dropped": dropped,
+		"total_bytes": sum(r["bytes"] for r in edges),
+		"heaviest": sorted(edges, key = lambda r: r["bytes"], reverse = True)[:max(0, top)],
+		"nodes": dict(sorted(per_node.items(), key = lambda item: item[1]["bytes"], reverse = True)),
+	}
\ No newline at end of file
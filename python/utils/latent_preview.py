@@ -0,0 +1,94 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Approximate latent-to-RGB projection for Dynamic Preview.
+Uses the linear latent2rgb factors of the model's latent format, as ComfyUI's latent previewer does, without a VAE.
+When no model is known the factors are picked by channel count.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Fallback per channel count when the latent format is unknown: (factors [C][3], bias [3]).
+# 4 channels use the SDXL factors, 16 channels the Flux factors.
+_LATENT_RGB_FACTORS: Dict[int, Tuple[List[List[float]], List[float]]] = {
+	4: (
+		[
+			[0.3651, 0.4232, 0.4341],
+			[-0.2533, -0.0042, 0.1068],
+			[0.1076, 0.1111, -0.0362],
+			[-0.3165, -0.2492, -0.2188],
+		],
+		[0.1084, -0.0175, -0.0011],
+	),
+	16: (
+		[
+			[-0.0346, 0.0244, 0.0681],
+			[0.0034, 0.0210, 0.0687],
+			[0.0275, -0.0668, -0.0433],
+			[-0.0174, 0.0160, 0.0617],
+			[0.0859, 0.0721, 0.0329],
+			[0.0004, 0.0383, 0.0115],
+			[0.0405, 0.0861, 0.0915],
+			[-0.0236, -0.0185, -0.0259],
+			[-0.0245, 0.0250, 0.1180],
+			[0.1008, 0.0755, -0.0421],
+			[-0.0515, 0.0201, 0.0011],
+			[0.0428, -0.0012, -0.0036],
+			[0.0817, 0.0765, 0.0749],
+			[-0.1264, -0.0522, -0.1103],
+			[-0.0280, -0.0881, -0.0499],
+			[-0.1262, -0.0982, -0.0778],
+		],
+		[-0.0329, -0.0718, -0.0851],
+	),
+}
+
+
+def latent_format_of(value) -> Optional[Any]:
+	"""The latent format of a MODEL (ComfyUI ModelPatcher), or value itself when it is a latent format; otherwise None."""
+	for candidate in (value, getattr(getattr(value, "model", None), "latent_format", None)):
+		if isinstance(getattr(candidate, "latent_rgb_factors", None), (list, tuple)):
+			return candidate
+	return None
+
+
+def _factors_for(channels: int, latent_format) -> Optional[Tuple[List[List[float]], List[float]]]:
+	factors = getattr(latent_format, "latent_rgb_factors", None)
+	if isinstance(factors, (list, tuple)) and len(factors) == channels:
+		return factors, getattr(latent_format, "latent_rgb_factors_bias", None) or [0.0, 0.0, 0.0]
+	return _LATENT_RGB_FACTORS.get(channels)
+
+
+def latent_to_rgb(samples, latent_format = None) -> Optional[Any]:
+	"""
+	Projects latent samples to RGB frames with a single batched matmul.
+
+	Args:
+	    samples: Latent tensor shaped [B, C, H, W] or [B, C, T, H, W].
+	    latent_format: The model's latent format (see latent_format_of). Its factors are used when they match the
+	        channel count, the per channel count fallback otherwise.
+
+	Returns:
+	    Optional[torch.Tensor]: Frames shaped [N, H, W, 3] in [0, 1] on the samples' device, or None if the shape or channel count is unsupported.
+	"""
+	import torch
+
+	if samples.dim() not in (4, 5):
+		return None
+	entry = _factors_for(samples.shape[1], latent_format)
+	if entry is None:
+		return None
+
+	factors, bias = entry
+	weight = torch.tensor(factors, dtype = torch.float32, device = samples.device)
+	offset = torch.tensor(bias, dtype = torch.float32, device = samples.device)
+
+	# Channels last, every remaining axis is batched through one matmul
+	rgb = samples.detach().to(torch.float32).movedim(1, -1) @ weight + offset
+	rgb = ((rgb + 1.0) / 2.0).clamp(0.0, 1.0)
+	return rgb.reshape(-1, *rgb.shape[-3:])
\ No newline at end of file
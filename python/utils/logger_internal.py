@@ -9,13 +9,28 @@ Logging helper module for Tojioo Passthrough Nodes.
 Integrates with ComfyUI's logging system for consistent log output.
 """
 
+import atexit
+import copy
 import logging
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+from ..config import settings
+
 
 _MODULE_NAME = "TojiooPassthrough"
 
+_LEVELS = {
+	"debug": logging.DEBUG,
+	"info": logging.INFO,
+	"warning": logging.WARNING,
+	"error": logging.ERROR,
+	"critical": logging.CRITICAL,
+}
+
 _LEVEL_STYLES = {
 	logging.DEBUG: ("\033[95m", "[Tojioo Passthrough]"),  # Purple
 	logging.INFO: ("\033[94m", "ℹ [Tojioo Passthrough]"),  # Deep blue
@@ -58,18 +73,68 @@ class _SafeStreamHandler(logging.StreamHandler):
 				pass
 
 
-def _get_logger(name: str) -> logging.Logger:
-	logger = logging.getLogger(f"{_MODULE_NAME}.{name}")
+class _TojiooQueueHandler(QueueHandler):
+	"""Resolves the message on the calling thread and leaves colouring and tracebacks to the listener."""
 
-	if not logger.handlers:
-		logger.setLevel(logging.DEBUG)
 
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		record = copy.copy(record)
+		record.msg = record.getMessage()
+		record.args = None
+		return record
+
+
+	def emit(self, record: logging.LogRecord) -> None:
+		if _listener is None:
+			_start_listener()
+		super().emit(record)
+
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = _TojiooQueueHandler(_queue)
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+def log_level() -> int:
+	"""Level from TOJIOO_LOG_LEVEL (debug, info, warning, error or critical); info when unset or unknown."""
+	return _LEVELS.get(settings.LOG_LEVEL, logging.INFO)
+
+
+def _start_listener() -> None:
+	"""
+	Starts the thread that drains the shared queue into stdout, so a slow or blocked stream never stalls the
+	thread that logged.
+	"""
+	global _listener
+	with _lock:
+		if _listener is not None:
+			return
 		stream = getattr(sys, "__stdout__", sys.stdout)
 		handler = _SafeStreamHandler(stream)
-		handler.setLevel(logging.DEBUG)
 		handler.setFormatter(_TojiooFormatter())
+		_listener = QueueListener(_queue, handler)
+		_listener.start()
+
+
+def flush() -> None:
+	"""Writes every queued record and stops the listener thread; the next record starts it again."""
+	global _listener
+	with _lock:
+		listener, _listener = _listener, None
+	if listener is not None:
+		listener.stop()
+
 
-		logger.addHandler(handler)
+atexit.register(flush)
+
+
+def _get_logger(name: str) -> logging.Logger:
+	logger = logging.getLogger(f"{_MODULE_NAME}.{name}")
+
+	if not logger.handlers:
+		logger.setLevel(log_level())
+		logger.addHandler(_queue_handler)
 		logger.propagate = False
 
 	return logger
@@ -153,4 +218,4 @@ def log_error(message: str, module: str = "Core", exception: Optional[Exception]
 	logger.error(message, exc_info = exception)
 
 
-__all__ = ["get_logger", "log_info", "log_warning", "log_debug", "log_error"]
\ No newline at end of file
+__all__ = ["get_logger", "log_info", "log_warning", "log_debug", "log_error", "log_level", "flush"]
\ No newline at end of file
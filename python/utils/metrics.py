@@ -0,0 +1,197 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+In-process metrics registry and memory measurement helpers.
+Each metric keeps its most recent records in a fixed-size ring buffer that can be queried or dumped as JSON.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from ..config import settings
+
+
+_SAMPLE_INTERVAL = 0.005
+
+
+class MetricsRegistry:
+	"""Thread-safe named ring buffers of metric records."""
+
+
+	def __init__(self, capacity: int) -> None:
+		self.capacity = max(1, capacity)
+		self._buffers: Dict[str, Deque[Dict[str, Any]]] = {}
+		self._lock = threading.Lock()
+
+
+	def record(self, name: str, **fields: Any) -> Dict[str, Any]:
+		entry = {"time": time.time(), **fields}
+		with self._lock:
+			buffer = self._buffers.get(name)
+			if buffer is None:
+				buffer = self._buffers[name] = deque(maxlen = self.capacity)
+			buffer.append(entry)
+		return entry
+
+
+	def records(self, name: str) -> List[Dict[str, Any]]:
+		with self._lock:
+			return [dict(entry) for entry in self._buffers.get(name, ())]
+
+
+	def names(self) -> List[str]:
+		with self._lock:
+			return sorted(self._buffers)
+
+
+	def clear(self, name: Optional[str] = None) -> None:
+		with self._lock:
+			if name is None:
+				self._buffers.clear()
+			else:
+				self._buffers.pop(name, None)
+
+
+	def to_json(self, name: Optional[str] = None) -> str:
+		"""Records of one metric, or of every metric keyed by name, as JSON."""
+		if name is not None:
+			return json.dumps(self.records(name), default = str)
+		return json.dumps({n: self.records(n) for n in self.names()}, default = str)
+
+
+def rss_bytes() -> int:
+	"""Resident set size of this process, or 0 when it cannot be read."""
+	try:
+		with open("/proc/self/statm", "r", encoding = "ascii") as f:
+			return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError, IndexError, AttributeError):
+		pass
+	try:
+		import psutil
+
+		return int(psutil.Process().memory_info().rss)
+	except Exception:
+		return 0
+
+
+class PeakMemory:
+	"""Peak memory above the starting point: CUDA allocator stats on GPU, sampled process RSS otherwise."""
+
+
+	def __init__(self, device = None) -> None:
+		self._cuda = getattr(device, "type", str(device)) == "cuda"
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._baseline = 0
+		self._peak = 0
+		self.peak_bytes = 0
+
+
+	def __enter__(self) -> "PeakMemory":
+		if self._cuda:
+			import torch
+
+			torch.cuda.synchronize()
+			torch.cuda.reset_peak_memory_stats()
+			self._baseline = torch.cuda.memory_allocated()
+		else:
+			self._baseline = self._peak = rss_bytes()
+			self._thread = threading.Thread(target = self._sample, name = "TojiooPeakMemory", daemon = True)
+			self._thread.start()
+		return self
+
+
+	def __exit__(self, *exc) -> None:
+		if self._cuda:
+			import torch
+
+			torch.cuda.synchronize()
+			self._peak = torch.cuda.max_memory_allocated()
+		else:
+			self._stop.set()
+			self._thread.join()
+			self._peak = max(self._peak, rss_bytes())
+		self.peak_bytes = max(0, self._peak - self._baseline)
+
+
+	def _sample(self) -> None:
+		while not self._stop.wait(_SAMPLE_INTERVAL):
+			self._peak = max(self._peak, rss_bytes())
+
+
+def _reset_peak_rss() -> bool:
+	"""Resets the kernel's peak RSS mark (VmHWM) of this process to its current RSS; False where unsupported."""
+	try:
+		with open("/proc/self/clear_refs", "w", encoding = "ascii") as f:
+			f.write("5")
+		return True
+	except OSError:
+		return False
+
+
+def _peak_rss_bytes() -> int:
+	"""Peak resident set size (VmHWM) of this process, or 0 when it cannot be read."""
+	try:
+		with open("/proc/self/status", "r", encoding = "ascii") as f:
+			for line in f:
+				if line.startswith("VmHWM:"):
+					return int(line.split()[1]) * 1024
+	except (OSError, ValueError, IndexError):
+		pass
+	return 0
+
+
+class CallPeakMemory:
+	"""
+	Peak memory of a single call without a sampler thread: the process RSS peak, which includes torch CPU tensors,
+	and the CUDA allocator peak when torch has already initialized CUDA. On Linux the kernel's peak RSS mark is
+	reset for the call, so short-lived allocations count; elsewhere only the RSS at the end of the call is seen.
+	The RSS peak is process-wide, so work running on other threads during the call is included.
+	"""
+
+
+	def __init__(self) -> None:
+		self._cuda = False
+		self._high_water = False
+		self._baseline = 0
+		self._cuda_baseline = 0
+		self.peak_bytes = 0
+		self.cuda_peak_bytes = 0
+
+
+	def __enter__(self) -> "CallPeakMemory":
+		torch = sys.modules.get("torch")
+		try:
+			self._cuda = bool(torch is not None and torch.cuda.is_initialized())
+		except Exception:
+			self._cuda = False
+		if self._cuda:
+			torch.cuda.reset_peak_memory_stats()
+			self._cuda_baseline = torch.cuda.memory_allocated()
+
+		self._baseline = rss_bytes()
+		self._high_water = _reset_peak_rss()
+		return self
+
+
+	def __exit__(self, *exc) -> None:
+		peak = rss_bytes()
+		if self._high_water:
+			peak = max(peak, _peak_rss_bytes())
+		self.peak_bytes = max(0, peak - self._baseline)
+		if self._cuda:
+			import torch
+
+			self.cuda_peak_bytes = max(0, torch.cuda.max_memory_allocated() - self._cuda_baseline)
+
+
+METRICS = MetricsRegistry(settings.METRICS_CAPACITY)
\ No newline at end of file
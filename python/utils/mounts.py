@@ -0,0 +1,63 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Mount lookup from /proc/self/mountinfo, used to choose how model files are read.
+"""
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+
+_MOUNTINFO = "/proc/self/mountinfo"
+_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+def _unescape(field: str) -> str:
+	return _ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_mountinfo(text: str) -> List[Tuple[str, str]]:
+	"""
+	Returns (mount point, filesystem type) pairs from mountinfo text.
+
+	Lines look like "36 35 98:0 /root /mnt/point rw,noatime shared:1 - ext4 /dev/sda1 rw"; the optional fields
+	before the "-" separator vary in number.
+	"""
+	mounts: List[Tuple[str, str]] = []
+	for line in text.splitlines():
+		fields = line.split()
+		if "-" not in fields or len(fields) < 5:
+			continue
+		separator = fields.index("-")
+		if separator + 1 >= len(fields):
+			continue
+		mounts.append((_unescape(fields[4]), fields[separator + 1]))
+	return mounts
+
+
+def read_mounts() -> List[Tuple[str, str]]:
+	try:
+		with open(_MOUNTINFO, "r", encoding = "utf-8", errors = "replace") as f:
+			return parse_mountinfo(f.read())
+	except OSError:
+		return []
+
+
+def mount_for(path: str, mounts: Optional[List[Tuple[str, str]]] = None) -> Optional[Tuple[str, str]]:
+	"""The (mount point, filesystem type) holding path, by longest mount point prefix; None when unknown."""
+	if mounts is None:
+		mounts = read_mounts()
+	real = os.path.realpath(path)
+	best = None
+	for mount_point, fs_type in mounts:
+		prefix = mount_point.rstrip("/") + "/"
+		if (real == mount_point or real.startswith(prefix) or mount_point == "/") and (
+				best is None or len(mount_point) >= len(best[0])
+		):
+			best = (mount_point, fs_type)
+	return best
\ No newline at end of file
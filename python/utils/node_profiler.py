@@ -0,0 +1,195 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Opt-in per-call profiling of registered nodes.
+Wraps each node class's FUNCTION and records wall time, CPU time, tensor bytes in and out and the
+peak RSS and CUDA memory of every call under "node_profile" in the metrics registry.
+"""
+
+import functools
+import inspect
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .logger_internal import get_logger
+from .metrics import METRICS, CallPeakMemory
+
+
+logger = get_logger(__name__)
+
+_MAX_DEPTH = 6
+_WRAPPED = "_tojioo_profiled"
+
+
+def value_nbytes(value: Any, _seen: Optional[set] = None, _depth: int = 0) -> int:
+	"""Total storage of the tensors reachable through dicts, lists and tuples, counting each tensor once."""
+	if _seen is None:
+		_seen = set()
+	if _depth > _MAX_DEPTH or id(value) in _seen:
+		return 0
+	if hasattr(value, "element_size") and hasattr(value, "numel"):
+		_seen.add(id(value))
+		try:
+			return value.element_size() * value.numel()
+		except Exception:
+			return 0
+	if isinstance(value, dict):
+		_seen.add(id(value))
+		return sum(value_nbytes(v, _seen, _depth + 1) for v in value.values())
+	if isinstance(value, (list, tuple)):
+		_seen.add(id(value))
+		return sum(value_nbytes(v, _seen, _depth + 1) for v in value)
+	return 0
+
+
+def executing_context() -> Dict[str, Any]:
+	"""Prompt and node id of the node ComfyUI is executing, when the running version exposes them."""
+	try:
+		from comfy_execution.utils import get_executing_context
+
+		context = get_executing_context()
+	except Exception:
+		return {"prompt_id": None, "node_id": None}
+	return {"prompt_id": getattr(context, "prompt_id", None), "node_id": getattr(context, "node_id", None)}
+
+
+def _profiled(node_type: str, fn: Callable) -> Callable:
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		bytes_in = value_nbytes((args, kwargs))
+		with CallPeakMemory() as peak:
+			start_wall = time.perf_counter()
+			start_cpu = time.thread_time()
+			result = fn(*args, **kwargs)
+			wall_s = time.perf_counter() - start_wall
+			cpu_s = time.thread_time() - start_cpu
+		METRICS.record(
+			"node_profile",
+			node_type = node_type,
+			**executing_context(),
+			wall_s = wall_s,
+			cpu_s = cpu_s,
+			bytes_in = bytes_in,
+			bytes_out = value_nbytes(result),
+			peak_bytes = peak.peak_bytes,
+			cuda_peak_bytes = peak.cuda_peak_bytes,
+		)
+		return result
+
+
+	return wrapper
+
+
+def wrap_node_functions(mappings: Dict[str, type], wrap: Callable[[str, type, Callable], Callable], marker: str) -> int:
+	"""
+	Replaces FUNCTION of every class in a NODE_CLASS_MAPPINGS dict with wrap(node_type, cls, fn), keeping its
+	static/class/instance binding. Functions already carrying the marker attribute are left alone.
+
+	Returns:
+	    int: Number of classes wrapped by this call.
+	"""
+	wrapped = 0
+	for node_type, cls in mappings.items():
+		name = getattr(cls, "FUNCTION", None)
+		if not name:
+			continue
+		try:
+			raw = inspect.getattr_static(cls, name)
+		except AttributeError:
+			continue
+
+		if isinstance(raw, staticmethod):
+			target, rebind = raw.__func__, staticmethod
+		elif isinstance(raw, classmethod):
+			target, rebind = raw.__func__, classmethod
+		elif callable(raw):
+			target, rebind = raw, lambda f: f
+		else:
+			continue
+		if getattr(target, marker, False):
+			continue
+
+		wrapper = wrap(node_type, cls, target)
+		setattr(wrapper, marker, True)
+		# Set on the class itself, so generated subclasses sharing one implementation are told apart
+		setattr(cls, name, rebind(wrapper))
+		wrapped += 1
+	return wrapped
+
+
+def install_node_profiler(mappings: Dict[str, type]) -> int:
+	"""Profiles every node class in a NODE_CLASS_MAPPINGS dict; returns the number of classes wrapped."""
+	wrapped = wrap_node_functions(mappings, lambda node_type, cls, fn: _profiled(node_type, fn), _WRAPPED)
+	logger.debug("Node profiler installed on %d node classes", wrapped)
+	return wrapped
+
+
+def summarize(records = None) -> Dict[str, Dict[str, Any]]:
+	"""Per node type totals of the "node_profile" records: calls, wall and CPU time, bytes and the largest peaks."""
+	summary: Dict[str, Dict[str, Any]] = {}
+	for r in records if records is not None else METRICS.records("node_profile"):
+		entry = summary.setdefault(r["node_type"], {
+			"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "bytes_in": 0, "bytes_out": 0, "peak_bytes": 0, "cuda_peak_bytes": 0,
+		})
+		entry["calls"] += 1
+		entry["wall_s"] += r["wall_s"]
+		entry["cpu_s"] += r["cpu_s"]
+		entry["bytes_in"] += r["bytes_in"]
+		entry["bytes_out"] += r["bytes_out"]
+		entry["peak_bytes"] = max(entry["peak_bytes"], r["peak_bytes"])
+		entry["cuda_peak_bytes"] = max(entry["cuda_peak_bytes"], r.get("cuda_peak_bytes", 0))
+	return dict(sorted(summary.items(), key = lambda item: item[1]["wall_s"], reverse = True))
+
+
+def profile_json() -> str:
+	return json.dumps({"summary": summarize(), "calls": METRICS.records("node_profile")}, default = str)
+
+
+def register_routes() -> bool:
+	"""
+	Adds GET /tojioo_passthrough/metrics (every metric), /tojioo_passthrough/profile (node profile with
+	per-type summary) and /tojioo_passthrough/edges (heaviest traced edges of a prompt) to the ComfyUI server.
+	Returns False when no server is running.
+	"""
+	try:
+		from server import PromptServer
+
+		server = getattr(PromptServer, "instance", None)
+	except Exception:
+		server = None
+	if server is None or not hasattr(server, "routes"):
+		return False
+
+	from aiohttp import web
+
+
+	@server.routes.get("/tojioo_passthrough/metrics")
+	async def _metrics(request):
+		return web.Response(text = METRICS.to_json(), content_type = "application/json")
+
+
+	@server.routes.get("/tojioo_passthrough/profile")
+	async def _profile(request):
+		return web.Response(text = profile_json(), content_type = "application/json")
+
+
+	@server.routes.get("/tojioo_passthrough/edges")
+	async def _edges(request):
+		from .edge_tracer import edge_report
+
+		try:
+			top = int(request.query.get("top", 50))
+		except ValueError:
+			top = -1
+		if top < 0:
+			return web.json_response({"error": "top must be a non-negative integer"}, status = 400)
+		report = edge_report(request.query.get("prompt_id"), top)
+		return web.json_response(report, dumps = lambda value: json.dumps(value, default = str))
+
+
+	return True
\ No newline at end of file
@@ -0,0 +1,80 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from ..config import settings
+
+
+_SAMPLE_COUNT = 4096
+
+
+def tensor_fingerprint(t) -> Optional[tuple]:
+	"""
+	Builds a cheap content key for a tensor from its shape, dtype, a full sum and a hash of a strided sample.
+	Returns None when the value cannot be fingerprinted.
+	"""
+	try:
+		import torch
+
+		flat = t.detach().reshape(-1)
+		stride = max(1, flat.numel() // _SAMPLE_COUNT)
+		sample = flat[::stride][:_SAMPLE_COUNT].to(torch.float32).cpu().numpy()
+		digest = hashlib.blake2b(sample.tobytes(), digest_size = 16).hexdigest()
+		total = float(flat.sum(dtype = torch.float64))
+		return tuple(t.shape), str(t.dtype), total, digest
+	except Exception:
+		return None
+
+
+class PreviewCache:
+	"""Bounded LRU mapping tensor fingerprints to preview files that are already in the temp directory."""
+
+
+	def __init__(self, max_entries: int) -> None:
+		self.max_entries = max_entries
+		self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+		self._lock = threading.Lock()
+
+
+	def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+		with self._lock:
+			item = self._entries.get(key)
+			if item is None:
+				return None
+			path, entry = item
+			# Temp directory is wiped on restart and can be cleaned externally
+			if not os.path.exists(path):
+				del self._entries[key]
+				return None
+			self._entries.move_to_end(key)
+			return dict(entry)
+
+
+	def put(self, key: Hashable, path: str, entry: Dict[str, Any]) -> None:
+		if self.max_entries <= 0:
+			return
+		with self._lock:
+			self._entries[key] = (path, dict(entry))
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last = False)
+
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+PREVIEW_CACHE = PreviewCache(settings.PREVIEW_CACHE_SIZE)
\ No newline at end of file
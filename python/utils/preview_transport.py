@@ -0,0 +1,229 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Preview transports for Dynamic Preview.
+A transport takes an encoded-ready PIL image and returns the UI entry the frontend uses to display it.
+"""
+
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .logger_internal import get_logger
+from .preview_cache import PREVIEW_CACHE, PreviewCache, tensor_fingerprint
+from .preview_writer import PREVIEW_WRITER, PreviewWriter
+from ..config import settings
+
+
+logger = get_logger(__name__)
+
+# Mirrors server.BinaryEventTypes.PREVIEW_IMAGE and the frontend's PNG image type id
+_PREVIEW_IMAGE_EVENT = 1
+_PNG_IMAGE_TYPE = 2
+
+# Next free counter per temp filename base, so frames never need a directory scan after the first one
+_counter_lock = threading.Lock()
+_next_counters: Dict[str, int] = {}
+
+
+class PreviewTransport:
+	"""Delivers preview frames to the frontend."""
+
+
+	def fingerprint(self, img_t) -> Optional[tuple]:
+		"""Returns a reuse key for the frame tensor, or None when this transport cannot reuse frames."""
+		return None
+
+
+	def reuse(self, key: Optional[tuple], slot_idx: int) -> Optional[Dict[str, Any]]:
+		"""Returns the UI entry of an already delivered frame with the same key, if any."""
+		return None
+
+
+	def send(self, img, slot_idx: int, key: Optional[tuple] = None) -> Dict[str, Any]:
+		raise NotImplementedError
+
+
+class TempFileTransport(PreviewTransport):
+	"""Writes frames as PNG files to the temp directory; the frontend fetches them through /view."""
+
+
+	def __init__(
+		self, prompt = None, extra_pnginfo = None, prefix: str = "preview_",
+		cache: Optional[PreviewCache] = PREVIEW_CACHE, embed_metadata: Optional[bool] = None,
+		writer: Optional[PreviewWriter] = None) -> None:
+		self._prompt = prompt
+		self._extra_pnginfo = extra_pnginfo
+		self._prefix = prefix
+		self._cache = cache if cache is not None and cache.max_entries > 0 else None
+		self._embed_metadata = settings.PREVIEW_METADATA if embed_metadata is None else embed_metadata
+		self._metadata = None
+		self._metadata_ready = False
+		self._metadata_texts: Optional[list] = None
+		self._metadata_digest: Optional[str] = None
+		self._target: Optional[Tuple[str, str, str]] = None
+		self._counter = 0
+		self._writer = writer
+
+
+	def fingerprint(self, img_t) -> Optional[tuple]:
+		"""Tensor content plus a digest of the embedded metadata, so reused files never carry a stale workflow."""
+		if self._cache is None:
+			return None
+		key = tensor_fingerprint(img_t)
+		if key is None:
+			return None
+		if self._metadata_digest is None:
+			h = hashlib.blake2b(digest_size = 16)
+			for name, text in self._get_metadata_texts():
+				h.update(name.encode())
+				h.update(b"\0")
+				h.update(text.encode())
+				h.update(b"\0")
+			self._metadata_digest = h.hexdigest()
+		return key + (self._metadata_digest,)
+
+
+	def reuse(self, key: Optional[tuple], slot_idx: int) -> Optional[Dict[str, Any]]:
+		if key is None or self._cache is None:
+			return None
+		entry = self._cache.get(key)
+		if entry is not None:
+			entry["slot"] = slot_idx
+		return entry
+
+
+	def send(self, img, slot_idx: int, key: Optional[tuple] = None) -> Dict[str, Any]:
+		filepath, filename_with_counter, subfolder = self._reserve_path(img)
+		entry = {
+			"filename": filename_with_counter,
+			"subfolder": subfolder,
+			"type": "temp",
+			"slot": slot_idx,
+		}
+
+		# The filename is reserved, so the UI entry can be returned before the file exists
+		if self._writer is not None:
+			self._writer.submit(self._write, img, filepath, self._get_metadata(), key, entry)
+			# Writes queued ahead of this one, so the frontend knows how long to wait for the file
+			return {**entry, "pending": self._writer.pending()}
+		self._write(img, filepath, self._get_metadata(), key, entry)
+		return dict(entry)
+
+
+	def _write(self, img, filepath: str, metadata, key: Optional[tuple], entry: Dict[str, Any]) -> None:
+		img.save(filepath, pnginfo = metadata, compress_level = 4)
+		if key is not None and self._cache is not None:
+			self._cache.put(key, filepath, entry)
+
+
+	def _get_metadata_texts(self) -> list:
+		"""Serializes the prompt and workflow once per execution; empty when no metadata is embedded."""
+		if self._metadata_texts is None:
+			self._metadata_texts = []
+			if self._embed_metadata:
+				if self._prompt is not None:
+					self._metadata_texts.append(("prompt", json.dumps(self._prompt)))
+				if self._extra_pnginfo is not None:
+					for k, v in self._extra_pnginfo.items():
+						self._metadata_texts.append((k, json.dumps(v)))
+		return self._metadata_texts
+
+
+	def _get_metadata(self):
+		"""Builds the PNG text chunks once per execution and shares the result across frames."""
+		if not self._metadata_ready:
+			self._metadata_ready = True
+			texts = self._get_metadata_texts()
+			if texts:
+				from PIL.PngImagePlugin import PngInfo
+
+				self._metadata = PngInfo()
+				for k, text in texts:
+					self._metadata.add_text(k, text)
+		return self._metadata
+
+
+	def _reserve_path(self, img) -> Tuple[str, str, str]:
+		"""Scans the temp directory on the first frame only; later frames take the following counters."""
+		if self._target is None:
+			import folder_paths
+
+			full_output_folder, filename, counter, subfolder, _ = folder_paths.get_save_image_path(
+				self._prefix, folder_paths.get_temp_directory(), img.width, img.height
+			)
+			self._target = (full_output_folder, filename, subfolder)
+			self._counter = counter
+
+		full_output_folder, filename, subfolder = self._target
+		base = os.path.join(full_output_folder, filename)
+		with _counter_lock:
+			counter = max(self._counter, _next_counters.get(base, 0))
+			_next_counters[base] = counter + 1
+		self._counter = counter + 1
+
+		filename_with_counter = f"{filename}_{counter:05}_.png"
+		return os.path.join(full_output_folder, filename_with_counter), filename_with_counter, subfolder
+
+
+class WebSocketTransport(PreviewTransport):
+	"""Sends frames as binary websocket messages through the server's send hook. Nothing is written to disk."""
+
+
+	def __init__(self, server = None, compress_level: int = 1) -> None:
+		self._server = server
+		self._compress_level = compress_level
+		self._index = 0
+
+
+	def send(self, img, slot_idx: int, key: Optional[tuple] = None) -> Dict[str, Any]:
+		buffer = io.BytesIO()
+		img.save(buffer, format = "PNG", compress_level = self._compress_level)
+		payload = struct.pack(">I", _PNG_IMAGE_TYPE) + buffer.getvalue()
+		self._server.send_sync(_PREVIEW_IMAGE_EVENT, payload, getattr(self._server, "client_id", None))
+
+		entry = {"type": "binary", "slot": slot_idx, "index": self._index}
+		self._index += 1
+		return entry
+
+
+def _get_prompt_server():
+	try:
+		from server import PromptServer
+
+		return getattr(PromptServer, "instance", None)
+	except Exception:
+		return None
+
+
+def create_preview_transport(prompt = None, extra_pnginfo = None, mode: Optional[str] = None) -> PreviewTransport:
+	"""
+	Creates the transport for one preview execution.
+
+	Args:
+	    prompt: The hidden PROMPT input, embedded into temp files.
+	    extra_pnginfo: The hidden EXTRA_PNGINFO input, embedded into temp files.
+	    mode: "temp" or "websocket". Defaults to the TOJIOO_PREVIEW_TRANSPORT setting.
+
+	Returns:
+	    PreviewTransport: A fresh transport instance.
+	"""
+	mode = mode or settings.PREVIEW_TRANSPORT
+
+	if mode == "websocket":
+		server = _get_prompt_server()
+		if server is not None:
+			return WebSocketTransport(server)
+		logger.warning("Websocket preview transport requested but no server is running, using temp files.")
+	elif mode != "temp":
+		logger.warning("Unknown preview transport '%s', using temp files.", mode)
+
+	return TempFileTransport(prompt, extra_pnginfo, writer = PREVIEW_WRITER if settings.PREVIEW_ASYNC else None)
\ No newline at end of file
@@ -0,0 +1,66 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+from .logger_internal import get_logger
+from ..config import settings
+
+
+logger = get_logger(__name__)
+
+
+class PreviewWriter:
+	"""
+	Background worker that encodes and writes preview files.
+
+	Jobs go through a bounded queue; submit blocks while the queue is full, so a fast producer
+	is throttled to the encode rate instead of buffering unbounded image snapshots in memory.
+	"""
+
+
+	def __init__(self, max_pending: int) -> None:
+		self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize = max(1, max_pending))
+		self._thread: Optional[threading.Thread] = None
+		self._lock = threading.Lock()
+
+
+	def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+		self._ensure_started()
+		self._queue.put((fn, args))
+
+
+	def pending(self) -> int:
+		"""Number of jobs waiting in the queue, including one being written."""
+		return self._queue.unfinished_tasks
+
+
+	def flush(self) -> None:
+		"""Blocks until every submitted job has finished."""
+		self._queue.join()
+
+
+	def _ensure_started(self) -> None:
+		with self._lock:
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target = self._run, name = "TojiooPreviewWriter", daemon = True)
+				self._thread.start()
+
+
+	def _run(self) -> None:
+		while True:
+			fn, args = self._queue.get()
+			try:
+				fn(*args)
+			except Exception as e:
+				logger.warning("Background preview write failed", exc_info = e)
+			finally:
+				self._queue.task_done()
+
+
+PREVIEW_WRITER = PreviewWriter(settings.PREVIEW_ASYNC_QUEUE)
\ No newline at end of file
@@ -0,0 +1,364 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Alternative safetensors readers used by the WSL patch.
+The file header is parsed directly so tensors can be filled region by region instead of from a full in-memory copy.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .logger_internal import get_logger
+from .mounts import mount_for
+from ..config import settings
+
+
+logger = get_logger(__name__)
+
+STRATEGIES = ("native", "bulk", "parallel")
+
+# Filesystems where every request is a round trip: many outstanding reads beat one sequential reader
+_PARALLEL_FILESYSTEMS = {
+	"9p", "v9fs", "drvfs", "virtiofs", "nfs", "nfs4", "cifs", "smb3", "smbfs", "ceph", "glusterfs", "lustre",
+}
+# Local FUSE filesystems (ntfs-3g and similar) pay a user-space trip per page fault, so copy in bulk
+_BULK_FILESYSTEMS = {"fuse", "fuseblk"}
+
+_directory_strategies: Dict[str, str] = {}
+_strategy_lock = threading.Lock()
+
+
+_DTYPE_NAMES = {
+	"F64": "float64",
+	"F32": "float32",
+	"F16": "float16",
+	"BF16": "bfloat16",
+	"I64": "int64",
+	"I32": "int32",
+	"I16": "int16",
+	"I8": "int8",
+	"U64": "uint64",
+	"U32": "uint32",
+	"U16": "uint16",
+	"U8": "uint8",
+	"BOOL": "bool",
+	"F8_E4M3": "float8_e4m3fn",
+	"F8_E5M2": "float8_e5m2",
+}
+
+
+def strategy_for_filesystem(fs_type: str) -> str:
+	if fs_type in _PARALLEL_FILESYSTEMS or fs_type.startswith("fuse.sshfs"):
+		# Concurrent reads need positioned reads; without os.pread a bulk copy is the next best thing
+		return "parallel" if hasattr(os, "pread") else "bulk"
+	if fs_type in _BULK_FILESYSTEMS or fs_type.startswith("fuse"):
+		return "bulk"
+	return "native"
+
+
+def select_strategy(filename: str) -> str:
+	"""
+	Picks how to read a file: TOJIOO_LOADER_STRATEGY when set to a strategy, otherwise by the filesystem it lives on.
+
+	"native" leaves the load to safetensors' own memory map, "bulk" copies out of a prefetched map
+	(load_mmap) and "parallel" issues concurrent ranged reads (load_parallel). The choice is remembered per
+	directory, so /proc/self/mountinfo is only read for the first file loaded from each directory.
+	"""
+	if settings.LOADER_STRATEGY in STRATEGIES:
+		if settings.LOADER_STRATEGY == "parallel" and not hasattr(os, "pread"):
+			return "bulk"
+		return settings.LOADER_STRATEGY
+
+	directory = os.path.dirname(os.path.realpath(filename))
+	with _strategy_lock:
+		strategy = _directory_strategies.get(directory)
+	if strategy is not None:
+		return strategy
+
+	mount = mount_for(directory)
+	if mount is None:
+		strategy = "native"
+	else:
+		mount_point, fs_type = mount
+		strategy = strategy_for_filesystem(fs_type)
+		logger.debug("Loading safetensors from %s (%s) with the %s strategy", mount_point, fs_type, strategy)
+	with _strategy_lock:
+		_directory_strategies[directory] = strategy
+	return strategy
+
+
+def torch_dtype(name: str):
+	import torch
+
+	dtype = getattr(torch, _DTYPE_NAMES.get(name, ""), None)
+	if dtype is None:
+		raise ValueError(f"Unsupported safetensors dtype '{name}'")
+	return dtype
+
+
+def read_header(f) -> Tuple[Dict[str, Any], int]:
+	"""
+	Reads the safetensors header from a binary file object.
+
+	Returns:
+	    Tuple[Dict[str, Any], int]: Tensor entries by name ("__metadata__" removed) and the file offset of the data section.
+	"""
+	(length,) = struct.unpack("<Q", f.read(8))
+	header = json.loads(f.read(length))
+	header.pop("__metadata__", None)
+	return header, 8 + length
+
+
+def _advise(mm, advice_name: str, start: int = 0, length: int = 0) -> None:
+	advice = getattr(mmap, advice_name, None)
+	if advice is None or not hasattr(mm, "madvise"):
+		return
+	try:
+		# madvise needs a page-aligned start
+		aligned = start - start % mmap.PAGESIZE
+		mm.madvise(advice, aligned, length + start - aligned if length else 0)
+	except (OSError, ValueError):
+		pass
+
+
+def load_mmap(filename: str, on_first_byte: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+	"""
+	Loads every tensor by copying it out of a private memory map, one region at a time.
+
+	The whole file is announced with MADV_WILLNEED/MADV_SEQUENTIAL, so WSL prefetches it instead of faulting page
+	by page, and each region is released with MADV_DONTNEED once copied. Peak memory stays near one model size
+	instead of holding the raw file and the tensors at once. on_first_byte is called once the first tensor is copied.
+	"""
+	import torch
+
+	tensors: Dict[str, Any] = {}
+	with open(filename, "rb") as f:
+		header, data_start = read_header(f)
+		with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_COPY) as mm:
+			_advise(mm, "MADV_SEQUENTIAL")
+			_advise(mm, "MADV_WILLNEED")
+			for name, info in sorted(header.items(), key = lambda item: item[1]["data_offsets"][0]):
+				dtype = torch_dtype(info["dtype"])
+				begin, end = info["data_offsets"]
+				if end == begin:
+					tensors[name] = torch.empty(info["shape"], dtype = dtype)
+					continue
+				view = torch.frombuffer(mm, dtype = torch.uint8, count = end - begin, offset = data_start + begin)
+				tensors[name] = view.clone().view(dtype).reshape(info["shape"])
+				del view
+				if on_first_byte is not None:
+					on_first_byte()
+					on_first_byte = None
+				_advise(mm, "MADV_DONTNEED", data_start + begin, end - begin)
+	return tensors
+
+
+def _read_into(fd: int, view: memoryview, offset: int) -> None:
+	"""
+	Fills view with file bytes starting at offset, without touching the shared file position.
+
+	Where os.pread is missing (Windows) it seeks and reads instead, so callers sharing fd must serialize their reads.
+	"""
+	seek = not hasattr(os, "pread")
+	if seek:
+		os.lseek(fd, offset, os.SEEK_SET)
+	while len(view):
+		if seek:
+			data = os.read(fd, len(view))
+			n = len(data)
+			view[:n] = data
+		elif hasattr(os, "preadv"):
+			n = os.preadv(fd, [view], offset)
+		else:
+			data = os.pread(fd, len(view), offset)
+			n = len(data)
+			view[:n] = data
+		if n == 0:
+			raise EOFError(f"Unexpected end of file at offset {offset}")
+		view = view[n:]
+		offset += n
+
+
+def load_parallel(
+		filename: str,
+		workers: Optional[int] = None,
+		chunk_size: Optional[int] = None,
+		on_first_byte: Optional[Callable[[], None]] = None,
+) -> Dict[str, Any]:
+	"""
+	Loads every tensor with concurrent positioned reads straight into preallocated buffers.
+
+	Each tensor is split into chunk_size byte ranges that a thread pool reads with pread/preadv. Network and 9P
+	mounts serve several outstanding requests much faster than one sequential reader.
+
+	Args:
+	    filename: Path of the safetensors file.
+	    workers: Concurrent readers, defaults to TOJIOO_LOADER_WORKERS.
+	    chunk_size: Bytes per read, defaults to TOJIOO_LOADER_CHUNK_MB.
+	    on_first_byte: Called when the first range has been read.
+
+	Returns:
+	    Dict[str, torch.Tensor]: The state dict.
+	"""
+	import torch
+
+	workers = max(1, workers or settings.LOADER_WORKERS)
+	if not hasattr(os, "pread"):
+		# Seek-and-read fallback shares the file position, so only one reader at a time
+		workers = 1
+	chunk_size = max(mmap.PAGESIZE, chunk_size or settings.LOADER_CHUNK_MB * 1024 * 1024)
+
+	with open(filename, "rb") as f:
+		header, data_start = read_header(f)
+
+	tensors: Dict[str, Any] = {}
+	ranges: List[Tuple[memoryview, int]] = []
+	for name, info in header.items():
+		dtype = torch_dtype(info["dtype"])
+		begin, end = info["data_offsets"]
+		buffer = bytearray(end - begin)
+		if buffer:
+			tensors[name] = torch.frombuffer(buffer, dtype = torch.uint8).view(dtype).reshape(info["shape"])
+		else:
+			tensors[name] = torch.empty(info["shape"], dtype = dtype)
+		view = memoryview(buffer)
+		for start in range(0, len(buffer), chunk_size):
+			ranges.append((view[start:start + chunk_size], data_start + begin + start))
+
+	first_read = threading.Event()
+
+
+	def read(job: Tuple[memoryview, int]) -> None:
+		_read_into(fd, *job)
+		if on_first_byte is not None and not first_read.is_set():
+			first_read.set()
+			on_first_byte()
+
+
+	fd = os.open(filename, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+	try:
+		with ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "TojiooLoader") as pool:
+			# list() re-raises the first failed read
+			list(pool.map(read, ranges))
+	finally:
+		os.close(fd)
+	return tensors
+
+
+class _Pending:
+	__slots__ = ("info",)
+
+
+	def __init__(self, info: Dict[str, Any]) -> None:
+		self.info = info
+
+
+class LazyStateDict(MutableMapping):
+	"""
+	State dict backed by a safetensors file that reads only the header up front.
+
+	Each tensor is read on first access, under the instance lock, and kept afterwards, so callers that pick a subset
+	of keys (a VAE or CLIP out of a full checkpoint) only read those bytes. Assigned and deleted keys behave as in a
+	dict. The file descriptor closes once every tensor is loaded, on close(), or when the mapping is collected.
+	"""
+
+
+	def __init__(self, filename: str) -> None:
+		self.filename = filename
+		with open(filename, "rb") as f:
+			header, self._data_start = read_header(f)
+		self._items: "OrderedDict[str, Any]" = OrderedDict((name, _Pending(info)) for name, info in header.items())
+		self._pending = len(self._items)
+		self._fd: Optional[int] = None
+		self._lock = threading.Lock()
+
+
+	def __getitem__(self, key: str) -> Any:
+		value = self._items[key]
+		if isinstance(value, _Pending):
+			with self._lock:
+				value = self._items[key]
+				if isinstance(value, _Pending):
+					value = self._read(value.info)
+					self._items[key] = value
+					self._settle()
+		return value
+
+
+	def __setitem__(self, key: str, value: Any) -> None:
+		with self._lock:
+			previous = self._items.get(key)
+			self._items[key] = value
+			if isinstance(previous, _Pending):
+				self._settle()
+
+
+	def __delitem__(self, key: str) -> None:
+		with self._lock:
+			previous = self._items.pop(key)
+			if isinstance(previous, _Pending):
+				self._settle()
+
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(list(self._items))
+
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+
+	def __contains__(self, key: object) -> bool:
+		return key in self._items
+
+
+	@property
+	def loaded_keys(self) -> List[str]:
+		return [name for name, value in self._items.items() if not isinstance(value, _Pending)]
+
+
+	def close(self) -> None:
+		with self._lock:
+			if self._fd is not None:
+				os.close(self._fd)
+				self._fd = None
+
+
+	def __del__(self) -> None:
+		try:
+			self.close()
+		except Exception:
+			pass
+
+
+	def _read(self, info: Dict[str, Any]):
+		import torch
+
+		dtype = torch_dtype(info["dtype"])
+		begin, end = info["data_offsets"]
+		if end == begin:
+			return torch.empty(info["shape"], dtype = dtype)
+		if self._fd is None:
+			self._fd = os.open(self.filename, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+		buffer = bytearray(end - begin)
+		_read_into(self._fd, memoryview(buffer), self._data_start + begin)
+		return torch.frombuffer(buffer, dtype = torch.uint8).view(dtype).reshape(info["shape"])
+
+
+	def _settle(self) -> None:
+		"""Counts down outstanding tensors and releases the file once none are left."""
+		self._pending -= 1
+		if self._pending == 0 and self._fd is not None:
+			os.close(self._fd)
+			self._fd = None
\ No newline at end of file
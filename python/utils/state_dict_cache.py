@@ -0,0 +1,98 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+In-process cache of loaded safetensors state dicts, keyed by file identity.
+Switching back to a recently used model returns its tensors without reading the file again.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from ..config import settings
+
+
+def state_dict_nbytes(state_dict: Dict[str, Any]) -> int:
+	return sum(t.element_size() * t.numel() for t in state_dict.values() if hasattr(t, "element_size"))
+
+
+def file_key(filename: str, device: Any = "cpu") -> Optional[tuple]:
+	"""(realpath, size, mtime, device); a rewritten file gets a new key. None when the file cannot be inspected."""
+	try:
+		real = os.path.realpath(filename)
+		stat = os.stat(real)
+	except (OSError, TypeError, ValueError):
+		return None
+	return real, stat.st_size, stat.st_mtime_ns, str(device)
+
+
+class StateDictCache:
+	"""
+	Thread-safe LRU of state dicts bounded by total tensor bytes.
+
+	get returns a new dict holding the cached tensor objects, so callers may add, remove or replace keys freely;
+	the tensors themselves are shared and must not be modified in place.
+	"""
+
+
+	def __init__(self, max_bytes: int) -> None:
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+		self._bytes = 0
+		self._lock = threading.Lock()
+
+
+	@property
+	def nbytes(self) -> int:
+		return self._bytes
+
+
+	def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+		with self._lock:
+			item = self._entries.get(key)
+			if item is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return dict(item[0])
+
+
+	def put(self, key: Hashable, state_dict: Dict[str, Any]) -> None:
+		size = state_dict_nbytes(state_dict)
+		if self.max_bytes <= 0 or size > self.max_bytes:
+			return
+		with self._lock:
+			if key in self._entries:
+				self._bytes -= self._entries.pop(key)[1]
+			self._entries[key] = (dict(state_dict), size)
+			self._bytes += size
+			while self._bytes > self.max_bytes and self._entries:
+				_, (_, evicted) = self._entries.popitem(last = False)
+				self._bytes -= evicted
+
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._bytes = 0
+			self.hits = 0
+			self.misses = 0
+
+
+	def stats(self) -> Dict[str, int]:
+		return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+STATE_DICT_CACHE = StateDictCache(settings.LOADER_CACHE_MB * 1024 * 1024)
\ No newline at end of file
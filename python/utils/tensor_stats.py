@@ -0,0 +1,85 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Summary statistics for tensors shown in Dynamic Preview.
+Min/max and mean/variance are each computed by one fused reduction on the tensor's own device. Apart from
+the finite count, every statistic is read back with a single transfer.
+"""
+
+from typing import Any, Dict
+
+
+_HISTOGRAM_BINS = 16
+_SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def tensor_stats(t, bins: int = _HISTOGRAM_BINS) -> Dict[str, Any]:
+	"""
+	Computes min/max/mean/std over finite values, NaN/Inf counts and a histogram.
+
+	Args:
+	    t: The tensor to summarize.
+	    bins: Number of histogram bins spanning [min, max].
+
+	Returns:
+	    Dict[str, Any]: JSON-serializable statistics.
+	"""
+	import torch
+
+	stats: Dict[str, Any] = {
+		"shape": list(t.shape),
+		"dtype": str(t.dtype),
+		"device": str(t.device),
+		"numel": t.numel(),
+	}
+	if t.numel() == 0:
+		return stats
+
+	flat = t.detach().reshape(-1)
+	if flat.dtype not in (torch.float32, torch.float64):
+		# histc only supports full precision floats on every device
+		flat = flat.to(torch.float32)
+
+	finite = torch.isfinite(flat)
+	count = int(finite.sum())
+	# Only tensors holding NaN or Inf pay for a compacted copy and the NaN count
+	values = flat if count == flat.numel() else flat[finite]
+	nan = int(torch.isnan(flat).sum()) if count < flat.numel() else 0
+	stats["nan"] = nan
+	stats["inf"] = flat.numel() - count - nan
+	if count == 0:
+		return stats
+
+	low, high = torch.aminmax(values)
+	var, mean = torch.var_mean(values, correction = 0)
+	# With min = max = 0 histc spans the data's own range, so no bounds are read back first
+	histogram = torch.histc(values, bins = bins)
+
+	# Single device-to-host transfer for the remaining statistics
+	readback = torch.cat([torch.stack([low, high, mean, var]).to(torch.float64), histogram.to(torch.float64)]).cpu().tolist()
+	lo, hi, mean, var = readback[:4]
+	stats["min"] = lo
+	stats["max"] = hi
+	stats["mean"] = mean
+	stats["std"] = max(var, 0.0) ** 0.5
+	stats["histogram"] = [int(c) for c in readback[4:]]
+	return stats
+
+
+def format_tensor_stats(stats: Dict[str, Any], label: str = "Tensor") -> str:
+	"""Renders statistics from tensor_stats as preview text with a sparkline histogram."""
+	lines = [f"{label}: shape={stats['shape']}, dtype={stats['dtype']}, device={stats['device']}"]
+	if "mean" in stats:
+		lines.append(f"min={stats['min']:.6g}  max={stats['max']:.6g}  mean={stats['mean']:.6g}  std={stats['std']:.6g}")
+	if "nan" in stats:
+		lines.append(f"nan={stats['nan']}  inf={stats['inf']}")
+	histogram = stats.get("histogram")
+	if histogram:
+		peak = max(histogram) or 1
+		spark = "".join(_SPARK_CHARS[min(len(_SPARK_CHARS) - 1, c * len(_SPARK_CHARS) // (peak + 1))] for c in histogram)
+		lines.append(f"histogram [{stats['min']:.4g} .. {stats['max']:.4g}]: {spark}")
+	return "\n".join(lines)
\ No newline at end of file
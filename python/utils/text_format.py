@@ -0,0 +1,133 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Length- and depth-bounded text rendering for preview values.
+Output follows json.dumps(indent = 2) and stops as soon as the character budget is spent,
+so the cost is proportional to the preview rather than to the value.
+"""
+
+import json
+from typing import Any, List
+
+
+class _BudgetExhausted(Exception):
+	pass
+
+
+def _describe(value: Any) -> str:
+	"""One-line summary for values that are not expanded."""
+	shape = getattr(value, "shape", None)
+	dtype = getattr(value, "dtype", None)
+	if shape is not None and dtype is not None:
+		return f"<{type(value).__name__} shape={list(shape)} dtype={dtype}>"
+	if isinstance(value, dict):
+		return f"<dict with {len(value)} keys>"
+	if isinstance(value, (list, tuple, set, frozenset)):
+		return f"<{type(value).__name__} of {len(value)} items>"
+	return f"<{type(value).__name__}>"
+
+
+class _BoundedSerializer:
+
+	def __init__(self, max_len: int, max_depth: int, indent: int) -> None:
+		self._max_len = max_len
+		self._max_depth = max_depth
+		self._indent = indent
+		self._parts: List[str] = []
+		self._used = 0
+		# Open containers as [kind, total, started] for the truncation summary
+		self._stack: List[list] = []
+
+
+	def render(self, value: Any) -> str:
+		try:
+			self._write_value(value, 0)
+		except _BudgetExhausted:
+			self._parts.append("\n... (truncated" + self._summary() + ")")
+		return "".join(self._parts)
+
+
+	def _summary(self) -> str:
+		remaining = [
+			f"{total - started:,} more {'keys' if kind == 'dict' else 'items'} in {kind}"
+			for kind, total, started in reversed(self._stack)
+			if total - started > 0
+		]
+		return ": " + ", ".join(remaining) if remaining else ""
+
+
+	def _emit(self, text: str) -> None:
+		room = self._max_len - self._used
+		if len(text) > room:
+			self._parts.append(text[:room])
+			self._used = self._max_len
+			raise _BudgetExhausted
+		self._parts.append(text)
+		self._used += len(text)
+
+
+	def _write_value(self, value: Any, depth: int) -> None:
+		if value is None or isinstance(value, (bool, int, float)):
+			self._emit(json.dumps(value))
+		elif isinstance(value, str):
+			# Slice before escaping so huge strings are never copied whole
+			room = self._max_len - self._used
+			self._emit(json.dumps(value[:room + 1]) if len(value) > room else json.dumps(value))
+		elif isinstance(value, (dict, list, tuple)):
+			self._write_container(value, depth)
+		elif isinstance(value, (set, frozenset)) or getattr(value, "shape", None) is not None:
+			self._emit(json.dumps(_describe(value)))
+		else:
+			room = self._max_len - self._used
+			self._emit(json.dumps(str(value)[:room + 1]))
+
+
+	def _write_container(self, value, depth: int) -> None:
+		kind = type(value).__name__
+		is_dict = isinstance(value, dict)
+		open_char, close_char = ("{", "}") if is_dict else ("[", "]")
+		total = len(value)
+		if total == 0:
+			self._emit(open_char + close_char)
+			return
+		if depth >= self._max_depth:
+			self._emit(json.dumps(_describe(value)))
+			return
+
+		items = value.items() if is_dict else value
+		pad = "\n" + " " * (self._indent * (depth + 1))
+		frame = [kind, total, 0]
+		self._stack.append(frame)
+		self._emit(open_char)
+		for i, item in enumerate(items):
+			self._emit(("," if i else "") + pad)
+			frame[2] = i + 1
+			if is_dict:
+				key, item = item
+				self._emit(json.dumps(key if isinstance(key, str) else str(key)) + ": ")
+			self._write_value(item, depth + 1)
+		self._stack.pop()
+		self._emit("\n" + " " * (self._indent * depth) + close_char)
+
+
+def format_value(value: Any, max_len: int, max_depth: int = 8, indent: int = 2) -> str:
+	"""
+	Renders a value as indented JSON-like text, stopping once max_len characters are written.
+
+	Nested containers beyond max_depth are summarized by type and size, tensors and arrays by shape and dtype.
+	When the budget runs out, a trailing note lists how many keys or items were left unrendered at each level.
+
+	Args:
+	    value: The value to render.
+	    max_len: Character budget for the rendered text, excluding the truncation note.
+	    max_depth: Nesting depth after which containers are summarized.
+	    indent: Spaces per indentation level.
+
+	Returns:
+	    str: The rendered text.
+	"""
+	return _BoundedSerializer(max_len, max_depth, indent).render(value)
\ No newline at end of file
@@ -0,0 +1,238 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Measured tiled VAE settings.
+Sweeps tile/overlap combinations against a VAE, records throughput and peak memory, and keeps the
+Pareto-best setting per (VAE fingerprint, resolution bucket) in a JSON profile under the user directory.
+"""
+
+import gc
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence
+
+from .conditioning_cache import hash_state_dict
+from .logger_internal import get_logger
+from .metrics import PeakMemory
+from .tile_planner import TEMPORAL_MIN, TILE_STEP, memory_budget, temporal_overlap
+
+
+logger = get_logger(__name__)
+
+_BUCKET_PIXELS = 256
+_BUCKET_FRAMES = 16
+
+DEFAULT_TILE_SIZES = (256, 384, 512, 768, 1024, 1536)
+DEFAULT_OVERLAPS = (32, 64, 128)
+DEFAULT_TEMPORAL_SIZES = (16, 32, 64)
+
+
+def profile_path() -> str:
+	import folder_paths
+
+	return os.path.join(folder_paths.get_user_directory(), "tojioo_passthrough", "tiled_vae_profile.json")
+
+
+def load_profile(path: Optional[str] = None) -> Dict[str, Any]:
+	try:
+		with open(path or profile_path(), "r", encoding = "utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def save_profile(profile: Dict[str, Any], path: Optional[str] = None) -> None:
+	path = path or profile_path()
+	os.makedirs(os.path.dirname(path), exist_ok = True)
+	partial = f"{path}.{os.getpid()}.tmp"
+	with open(partial, "w", encoding = "utf-8") as f:
+		json.dump(profile, f, indent = 2)
+	os.replace(partial, path)
+
+
+_fingerprints: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+_fingerprint_lock = threading.Lock()
+
+
+def vae_fingerprint(vae) -> str:
+	"""
+	Stable key for a VAE from its class and weights.
+	Memoized per model object and patches_uuid, so the weights are hashed once per loaded VAE.
+	"""
+	model = getattr(vae, "first_stage_model", vae)
+	patches_uuid = str(getattr(getattr(vae, "patcher", None), "patches_uuid", ""))
+	with _fingerprint_lock:
+		try:
+			memo = _fingerprints.get(model)
+		except TypeError:
+			memo = None
+	if memo is not None and memo[0] == patches_uuid:
+		return memo[1]
+
+	h = hashlib.blake2b(digest_size = 12)
+	h.update(type(model).__name__.encode())
+	if hasattr(model, "state_dict"):
+		hash_state_dict(h, model.state_dict())
+	digest = f"{type(model).__name__}-{h.hexdigest()}"
+
+	with _fingerprint_lock:
+		try:
+			_fingerprints[model] = (patches_uuid, digest)
+		except TypeError:
+			pass
+	return digest
+
+
+def resolution_bucket(height: int, width: int, frames: int = 1) -> str:
+	"""Rounds the output size up to steps of 256 pixels (and 16 frames for video)."""
+	bucket = f"{math.ceil(height / _BUCKET_PIXELS) * _BUCKET_PIXELS}x{math.ceil(width / _BUCKET_PIXELS) * _BUCKET_PIXELS}"
+	if frames > 1:
+		bucket += f"x{math.ceil(frames / _BUCKET_FRAMES) * _BUCKET_FRAMES}"
+	return bucket
+
+
+def lookup(vae, height: int, width: int, frames: int = 1, path: Optional[str] = None) -> Optional[Dict[str, int]]:
+	"""Calibrated settings for this VAE and output size, or None when the bucket was not measured."""
+	entry = load_profile(path).get(vae_fingerprint(vae), {}).get(resolution_bucket(height, width, frames))
+	if not entry:
+		return None
+	return {k: entry[k] for k in ("tile_size", "overlap", "temporal_size", "temporal_overlap")}
+
+
+def _decode(vae, samples, tile_size: int, overlap: int, temporal_size: int, t_overlap: int):
+	"""Calls vae.decode_tiled with pixel settings converted to latent units, as VAE Decode (Tiled) does."""
+	compression = vae.spacial_compression_decode()
+	temporal_compression = vae.temporal_compression_decode()
+	if temporal_compression is not None:
+		tile_t = max(2, temporal_size // temporal_compression)
+		overlap_t = max(1, min(tile_t // 2, t_overlap // temporal_compression))
+	else:
+		tile_t = overlap_t = None
+	return vae.decode_tiled(
+		samples, tile_x = tile_size // compression, tile_y = tile_size // compression,
+		overlap = overlap // compression, tile_t = tile_t, overlap_t = overlap_t,
+	)
+
+
+def _latent_for(vae, height: int, width: int, frames: int):
+	import torch
+
+	compression = vae.spacial_compression_decode()
+	temporal_compression = vae.temporal_compression_decode()
+	shape = [1, getattr(vae, "latent_channels", 4)]
+	if temporal_compression is not None:
+		shape.append((max(1, frames) - 1) // temporal_compression + 1)
+	shape += [max(1, height // compression), max(1, width // compression)]
+	return torch.randn(*shape, device = getattr(vae, "device", None) or "cpu")
+
+
+def pareto_front(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""Results that no other result beats on both throughput and peak memory."""
+
+
+	def dominates(a, b) -> bool:
+		return (
+			a["pixels_per_second"] >= b["pixels_per_second"] and a["peak_bytes"] <= b["peak_bytes"]
+			and (a["pixels_per_second"] > b["pixels_per_second"] or a["peak_bytes"] < b["peak_bytes"])
+		)
+
+
+	return [r for r in results if not any(dominates(o, r) for o in results)]
+
+
+def calibrate(
+		vae,
+		height: int,
+		width: int,
+		frames: int = 1,
+		tile_sizes: Sequence[int] = DEFAULT_TILE_SIZES,
+		overlaps: Sequence[int] = DEFAULT_OVERLAPS,
+		temporal_sizes: Sequence[int] = DEFAULT_TEMPORAL_SIZES,
+		budget: Optional[int] = None,
+		path: Optional[str] = None,
+) -> Dict[str, Any]:
+	"""
+	Decodes a random latent with every tile/overlap combination and stores the best one in the profile.
+
+	The best setting is the fastest point of the throughput/peak-memory Pareto front that stays inside
+	the memory budget; when none does, the one with the lowest peak.
+
+	Args:
+	    vae: A ComfyUI VAE (anything with decode_tiled and the compression accessors).
+	    height: Output height in pixels.
+	    width: Output width in pixels.
+	    frames: Output frame count for video VAEs.
+	    tile_sizes: Spatial tile sizes to try; sizes beyond the output are skipped.
+	    overlaps: Spatial overlaps to try; overlaps above a quarter of the tile are skipped.
+	    temporal_sizes: Temporal tile sizes to try for video VAEs.
+	    budget: Peak memory limit in bytes, defaults to memory_budget().
+	    path: Profile file, defaults to profile_path().
+
+	Returns:
+	    Dict[str, Any]: The chosen setting with its measurements, plus "results" and "pareto" lists.
+	"""
+	if budget is None:
+		budget = memory_budget()
+	is_video = vae.temporal_compression_decode() is not None and frames > 1
+	longest = math.ceil(max(height, width) / TILE_STEP) * TILE_STEP
+	tiles = sorted({min(t, longest) for t in tile_sizes})
+	# Image VAEs ignore the temporal settings; keep the Tiled VAE Settings defaults so the outputs stay valid
+	temporal = sorted({max(TEMPORAL_MIN, min(t, frames)) for t in temporal_sizes}) if is_video else [64]
+
+	samples = _latent_for(vae, height, width, frames)
+	device = getattr(samples, "device", None)
+	# Warm-up so lazy model loading is not charged to the first setting
+	_decode(vae, samples, tiles[0], 0, temporal[0], temporal_overlap(temporal[0]))
+
+	results: List[Dict[str, Any]] = []
+	for temporal_size in temporal:
+		t_overlap = temporal_overlap(temporal_size)
+		for tile_size in tiles:
+			for overlap in sorted({o for o in overlaps if o <= tile_size // 4}):
+				gc.collect()
+				try:
+					with PeakMemory(device) as peak:
+						start = time.perf_counter()
+						_decode(vae, samples, tile_size, overlap, temporal_size, t_overlap)
+						elapsed = time.perf_counter() - start
+				except RuntimeError as e:
+					logger.warning("Tiled VAE calibration failed for tile %d, overlap %d", tile_size, overlap, exc_info = e)
+					continue
+				results.append({
+					"tile_size": tile_size,
+					"overlap": overlap,
+					"temporal_size": temporal_size,
+					"temporal_overlap": t_overlap,
+					"pixels_per_second": height * width * frames / max(elapsed, 1e-9),
+					"peak_bytes": peak.peak_bytes,
+				})
+
+	if not results:
+		raise RuntimeError("Tiled VAE calibration could not decode with any of the requested settings.")
+
+	front = sorted(pareto_front(results), key = lambda r: r["peak_bytes"])
+	fitting = [r for r in front if r["peak_bytes"] <= budget]
+	best = max(fitting, key = lambda r: r["pixels_per_second"]) if fitting else front[0]
+
+	profile = load_profile(path)
+	profile.setdefault(vae_fingerprint(vae), {})[resolution_bucket(height, width, frames)] = {
+		**best,
+		"measured": time.time(),
+		"pareto": front,
+	}
+	save_profile(profile, path)
+	logger.info(
+		"Calibrated tiled VAE for %dx%dx%d: tile %d, overlap %d, %.2f MP/s, peak %.0f MiB",
+		width, height, frames, best["tile_size"], best["overlap"],
+		best["pixels_per_second"] / 1e6, best["peak_bytes"] / 1024 ** 2,
+	)
+	return {**best, "results": results, "pareto": front}
\ No newline at end of file
@@ -0,0 +1,140 @@
+﻿# SPDX-License-Identifier: GPL-3.0-only
+# Tojioo Passthrough Nodes
+# Copyright (c) 2025 Tojioo
+# Licensed under the GNU General Public License v3.0 only.
+# See https://www.gnu.org/licenses/gpl-3.0.txt
+
+"""
+Memory cost model for tiled VAE settings.
+Picks the tile sizes that need the fewest tiles while a single tile stays inside a memory budget.
+"""
+
+import math
+from typing import Dict, Optional
+
+from ..config import settings
+
+
+# ComfyUI estimates SD VAE decoding at 2178 elements per output pixel; float32 on CPU
+BYTES_PER_PIXEL = 2178 * 4
+
+SPATIAL_COMPRESSION = 8
+TEMPORAL_COMPRESSION = 4
+
+TILE_MIN, TILE_MAX, TILE_STEP = 64, 4096, 32
+TEMPORAL_MIN, TEMPORAL_STEP = 8, 4
+
+_FALLBACK_AVAILABLE = 4 * 1024 ** 3
+
+
+def available_memory() -> int:
+	"""Available system RAM in bytes, from /proc/meminfo, psutil, or a 4 GiB fallback."""
+	try:
+		with open("/proc/meminfo", "r", encoding = "ascii") as f:
+			for line in f:
+				if line.startswith("MemAvailable:"):
+					return int(line.split()[1]) * 1024
+	except (OSError, ValueError, IndexError):
+		pass
+	try:
+		import psutil
+
+		return int(psutil.virtual_memory().available)
+	except Exception:
+		return _FALLBACK_AVAILABLE
+
+
+def memory_budget() -> int:
+	"""Byte budget for one tile: TOJIOO_TILED_VAE_BUDGET_MB, or half of the available RAM."""
+	if settings.TILED_VAE_BUDGET_MB > 0:
+		return settings.TILED_VAE_BUDGET_MB * 1024 * 1024
+	return available_memory() // 2
+
+
+def spatial_overlap(tile_size: int) -> int:
+	"""An eighth of the tile in steps of 32, never more than the quarter ComfyUI allows."""
+	return min(tile_size // 4, max(TILE_STEP, tile_size // 8 // TILE_STEP * TILE_STEP))
+
+
+def temporal_overlap(temporal_size: int) -> int:
+	return max(TEMPORAL_STEP, temporal_size // 8 // TEMPORAL_STEP * TEMPORAL_STEP)
+
+
+def _tile_count(length: int, size: int, overlap: int) -> int:
+	if length <= size:
+		return 1
+	return math.ceil((length - overlap) / (size - overlap))
+
+
+def plan_tiles(height: int, width: int, frames: int = 1, budget: Optional[int] = None) -> Dict[str, int]:
+	"""
+	Chooses tile_size, overlap, temporal_size and temporal_overlap for an output of the given size.
+
+	Every candidate whose largest tile fits the budget is scored by its total tile count; ties go to
+	the smaller tile, which wastes less work on padding. When nothing fits, the smallest tiles are used.
+
+	Args:
+	    height: Output height in pixels.
+	    width: Output width in pixels.
+	    frames: Output frame count (1 for images).
+	    budget: Bytes one tile may use, defaults to memory_budget().
+
+	Returns:
+	    Dict[str, int]: The four tiled VAE settings.
+	"""
+	if budget is None:
+		budget = memory_budget()
+	frames = max(1, frames)
+
+	temporal_max = max(TEMPORAL_MIN, math.ceil(frames / TEMPORAL_STEP) * TEMPORAL_STEP)
+	temporal_candidates = range(TEMPORAL_MIN, temporal_max + 1, TEMPORAL_STEP) if frames > 1 else [TEMPORAL_MIN]
+	spatial_max = min(TILE_MAX, max(TILE_MIN, math.ceil(max(height, width) / TILE_STEP) * TILE_STEP))
+
+	best = None
+	for temporal_size in temporal_candidates:
+		t_overlap = temporal_overlap(temporal_size)
+		t_frames = min(temporal_size, frames)
+		t_count = _tile_count(frames, temporal_size, t_overlap)
+		for tile_size in range(TILE_MIN, spatial_max + 1, TILE_STEP):
+			cost = min(tile_size, height) * min(tile_size, width) * t_frames * BYTES_PER_PIXEL
+			if cost > budget and best is not None:
+				break
+			overlap = spatial_overlap(tile_size)
+			count = _tile_count(height, tile_size, overlap) * _tile_count(width, tile_size, overlap) * t_count
+			score = (cost > budget, count, cost)
+			if best is None or score < best[0]:
+				best = (score, tile_size, overlap, temporal_size, t_overlap)
+
+	_, tile_size, overlap, temporal_size, t_overlap = best
+	return {
+		"tile_size": tile_size,
+		"overlap": overlap,
+		"temporal_size": temporal_size,
+		"temporal_overlap": t_overlap,
+	}
+
+
+def is_video_vae(vae) -> bool:
+	"""True for VAEs with temporal compression, which decode image batches as one clip of frames."""
+	try:
+		return vae is not None and vae.temporal_compression_decode() is not None
+	except Exception:
+		return False
+
+
+def output_size(image = None, latent = None, vae = None):
+	"""
+	Output (height, width, frames) for an IMAGE [B, H, W, C] or LATENT dict.
+
+	Latents are scaled by the VAE compression; 5D video latents decode (T - 1) * 4 + 1 frames. Image VAEs decode
+	each batch item on its own, so an image batch counts as one frame unless vae is a video VAE.
+	"""
+	if latent is not None:
+		samples = latent["samples"] if isinstance(latent, dict) else latent
+		shape = tuple(samples.shape)
+		frames = (shape[2] - 1) * TEMPORAL_COMPRESSION + 1 if len(shape) == 5 else 1
+		return shape[-2] * SPATIAL_COMPRESSION, shape[-1] * SPATIAL_COMPRESSION, frames
+	if image is not None:
+		shape = tuple(image.shape)
+		return shape[1], shape[2], shape[0] if is_video_vae(vae) else 1
+	return None
\ No newline at end of file
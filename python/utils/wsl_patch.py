@@ -4,29 +4,103 @@
 # Licensed under the GNU General Public License v3.0 only.
 # See https://www.gnu.org/licenses/gpl-3.0.txt
 
+import os
+import time
+
 from .logger_internal import get_logger
+from .metrics import METRICS, PeakMemory
+from .safetensors_loader import LazyStateDict, load_mmap, load_parallel, select_strategy
+from .state_dict_cache import STATE_DICT_CACHE, file_key
+from ..config import settings
 
 
 logger = get_logger(__name__)
 
 
+def _record_load(filename, device, strategy: str, total: float, first_byte, rss_delta: int) -> None:
+	"""Reports one load to the metrics registry ("safetensors_load") and the log."""
+	try:
+		size = os.path.getsize(filename)
+	except (OSError, TypeError, ValueError):
+		size = 0
+	# Cache hits and lazy dicts read no tensor data up front
+	mb_per_s = size / 1e6 / total if total > 0 and strategy not in ("cache", "lazy") else None
+
+	METRICS.record(
+		"safetensors_load",
+		file = os.path.basename(str(filename)),
+		path = str(filename),
+		device = str(device),
+		strategy = strategy,
+		size_bytes = size,
+		ttfb_s = first_byte,
+		total_s = total,
+		mb_per_s = mb_per_s,
+		rss_delta_bytes = rss_delta,
+	)
+
+	details = [f"{total:.2f} s"]
+	if mb_per_s is not None:
+		details.append(f"{mb_per_s:.0f} MB/s")
+	if first_byte is not None:
+		details.append(f"first byte {first_byte * 1000:.0f} ms")
+	details.append(f"peak RSS +{rss_delta / 1024 ** 2:.0f} MiB")
+	logger.info("Loaded '%s' (%.0f MB) via %s: %s", os.path.basename(str(filename)), size / 1e6, strategy, ", ".join(details))
+
+
 def apply_wsl_safetensors_patch():
 	try:
 		import safetensors.torch
 
-		_load_file_org = safetensors.torch.load_file
+		# Re-applying wraps the original loader again instead of stacking wrappers
+		_load_file_org = getattr(safetensors.torch.load_file, "_tojioo_original", safetensors.torch.load_file)
 
 
-		def _load_file_for_wsl(filename, device = "cpu", *args, **kwargs):
+		def _load_cpu(filename, device, on_first_byte, *args, **kwargs):
+			key = None
+			state_dict = None
+			strategy = "native"
 			try:
-				if device == "cpu":
-					with open(filename, "rb") as f:
-						return safetensors.torch.load(f.read())
+				if settings.LOADER_LAZY:
+					return LazyStateDict(filename), "lazy"
+
+				key = file_key(filename, device) if STATE_DICT_CACHE.max_bytes > 0 else None
+				cached = STATE_DICT_CACHE.get(key) if key is not None else None
+				if cached is not None:
+					return cached, "cache"
+
+				strategy = select_strategy(filename)
+				if strategy == "parallel":
+					state_dict = load_parallel(filename, on_first_byte = on_first_byte)
+				elif strategy == "bulk":
+					state_dict = load_mmap(filename, on_first_byte = on_first_byte)
 			except Exception as e:
-				logger.warning(f"WSL safetensors patch failed for '{filename}', falling back.",exc_info = e)
-			return _load_file_org(filename, device, *args, **kwargs)
+				logger.warning("WSL safetensors patch failed for '%s', falling back.", filename, exc_info = e)
+				strategy = "native"
+
+			if state_dict is None:
+				state_dict = _load_file_org(filename, device, *args, **kwargs)
+			if key is not None:
+				STATE_DICT_CACHE.put(key, state_dict)
+			return state_dict, strategy
+
+
+		def _load_file_for_wsl(filename, device = "cpu", *args, **kwargs):
+			start = time.perf_counter()
+			marks = {}
+			with PeakMemory() as peak:
+				if str(device) == "cpu":
+					state_dict, strategy = _load_cpu(
+						filename, device, lambda: marks.setdefault("first_byte", time.perf_counter()), *args, **kwargs
+					)
+				else:
+					state_dict, strategy = _load_file_org(filename, device, *args, **kwargs), "native"
+			first_byte = marks["first_byte"] - start if "first_byte" in marks else None
+			_record_load(filename, device, strategy, time.perf_counter() - start, first_byte, peak.peak_bytes)
+			return state_dict
 
 
+		_load_file_for_wsl._tojioo_original = _load_file_org
 		safetensors.torch.load_file = _load_file_for_wsl
 		logger.debug("WSL safetensors patch applied")
 	except ImportError:
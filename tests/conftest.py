@@ -21,7 +21,7 @@ def mock_if_missing(mod_names):
 				sys.modules[mod_name] = MagicMock()
 
 
-mock_if_missing(["folder_paths", "comfy", "comfy.utils"])
+mock_if_missing(["folder_paths", "comfy", "comfy.utils", "comfy.model_management"])
 mock_if_missing(
 	["torch", "numpy", "PIL", "PIL.Image", "PIL.PngImagePlugin", "safetensors", "safetensors.torch"]
 )
@@ -107,4 +107,87 @@ def pytest_ignore_collect(collection_path, config):
 	except Exception:
 		return False
 	root_init = Path(str(config.rootpath)) / "__init__.py"
-	return candidate.resolve() == root_init.resolve()
\ No newline at end of file
+	return candidate.resolve() == root_init.resolve()
+
+
+@pytest.fixture
+def real_torch():
+	"""The torch module; skips the test when torch is not installed and stood in for."""
+	import torch
+
+	if isinstance(torch, MagicMock):
+		pytest.skip("requires torch")
+	return torch
+
+
+@pytest.fixture
+def clip_stub():
+	"""
+	Factory for CLIP stand-ins that record the tokens they encode.
+	tokenize and encode replace the default text transforms; other keyword arguments become attributes
+	(cond_stage_model, patcher) that give the stub an identity for the conditioning caches.
+	"""
+
+
+	class ClipStub:
+
+		def __init__(self, tokenize = None, encode = None, **attributes):
+			self._tokenize = tokenize or (lambda text: f"tokens:{text}")
+			self._encode = encode or (lambda tokens: f"cond:{tokens}")
+			self.encoded = []
+			for name, value in attributes.items():
+				setattr(self, name, value)
+
+
+		def tokenize(self, text):
+			return self._tokenize(text)
+
+
+		def encode_from_tokens_scheduled(self, tokens):
+			self.encoded.append(tokens)
+			return self._encode(tokens)
+
+
+	return ClipStub
+
+
+@pytest.fixture
+def stand_in_vae(real_torch):
+	"""Small CPU VAE exposing the parts of ComfyUI's VAE that tiled decoding uses."""
+	import torch
+
+
+	class StandInVAE:
+		latent_channels = 4
+		device = torch.device("cpu")
+
+
+		def __init__(self):
+			torch.manual_seed(0)
+			self.first_stage_model = torch.nn.Conv2d(4, 3 * 64, 1)
+			self.calls = []
+
+
+		@staticmethod
+		def spacial_compression_decode():
+			return 8
+
+
+		@staticmethod
+		def temporal_compression_decode():
+			return None
+
+
+		def decode_tiled(self, samples, tile_x = None, tile_y = None, overlap = None, tile_t = None, overlap_t = None):
+			self.calls.append((tile_x, overlap))
+			step = max(1, tile_x - overlap)
+			out = torch.zeros(samples.shape[0], 3 * 64, samples.shape[2], samples.shape[3])
+			with torch.no_grad():
+				for y in range(0, samples.shape[2], step):
+					for x in range(0, samples.shape[3], step):
+						tile = samples[:, :, y:y + tile_y, x:x + tile_x]
+						out[:, :, y:y + tile_y, x:x + tile_x] = self.first_stage_model(tile)
+			return torch.nn.functional.pixel_shuffle(out, 8).movedim(1, -1)
+
+
+	return StandInVAE()
@@ -0,0 +1,97 @@
+import pytest
+
+from benchmarks.harness import case, compare, run_cases
+
+
+def _results(tensors = "torch", **cases):
+	return {"meta": {"tensors": tensors}, "cases": cases, "skipped": {}}
+
+
+def test_compare_reports_time_and_memory_regressions():
+	baseline = _results(
+		fast = {"median_s": 0.010, "peak_rss_bytes": 4 << 20, "peak_py_bytes": 1024, "output_bytes": 100},
+		big = {"median_s": 0.010, "peak_rss_bytes": 1 << 20, "peak_py_bytes": 1024, "output_bytes": 100},
+	)
+	results = _results(
+		fast = {"median_s": 0.012, "peak_rss_bytes": 100 << 20, "peak_py_bytes": 1024, "output_bytes": 100},
+		# RSS growth under the noise floor and Python allocation growth are not regressions
+		big = {"median_s": 0.020, "peak_rss_bytes": 4 << 20, "peak_py_bytes": 1 << 20, "output_bytes": 100},
+		new = {"median_s": 1.0, "peak_rss_bytes": 0, "peak_py_bytes": 0, "output_bytes": 0},
+	)
+	regressions = compare(results, baseline, tolerance = 0.25)
+	assert [(r["case"], r["metric"]) for r in regressions] == [("fast", "peak_rss_bytes"), ("big", "median_s")]
+	assert regressions[1]["ratio"] == pytest.approx(2.0)
+
+
+def test_compare_refuses_mixed_tensor_backends():
+	with pytest.raises(ValueError):
+		compare(_results("stub"), _results("torch"))
+
+
+def test_run_cases_filters_and_measures():
+	calls = []
+	cases = [
+		case("group/a", lambda: lambda: calls.append("a"), size = 1),
+		case("other/b", lambda: lambda: calls.append("b")),
+	]
+	results = run_cases(cases, pattern = "group", repeat = 2, min_time = 0.0)
+	assert list(results["cases"]) == ["group/a"]
+	assert results["cases"]["group/a"]["params"] == {"size": 1}
+	assert results["cases"]["group/a"]["median_s"] >= 0
+	assert set(calls) == {"a"}
+
+
+def test_main_says_when_no_baseline_is_compared(tmp_path, capsys):
+	from benchmarks.__main__ import main
+
+	baseline = tmp_path / "baseline.json"
+	assert main(["--filter", "switch/slots=2/connected=last", "--repeat", "1", "--min-time", "0", "--baseline", str(baseline)]) == 0
+	assert f"No baseline at {baseline}, comparison skipped" in capsys.readouterr().out
+
+
+def _example_workflow():
+	import json
+	from pathlib import Path
+
+	path = Path(__file__).resolve().parent.parent / "example_workflows" / "Tojioo Passthrough.json"
+	with open(path, "r", encoding = "utf-8") as f:
+		return json.load(f)
+
+
+def test_flatten_workflow_resolves_subgraph_boundaries():
+	from benchmarks.replay import flatten_workflow, replicate, topological_order
+
+	flat = flatten_workflow(_example_workflow())
+	assert flat["482:78"]["inputs"]["bus"] == ("483:89", 0)
+	assert flat["481:85"]["inputs"]["bus"] == ("482:80", 0)
+	assert flat["484"]["inputs"]["input_2"] == ("481:85", 1)
+
+	order = topological_order(flat)
+	assert order.index("483:89") < order.index("482:78") < order.index("482:80") < order.index("481:85")
+
+	copies = replicate(flat, 3)
+	assert len(copies) == 3 * len(flat)
+	assert copies["2/482:78"]["inputs"]["bus"] == ("2/483:89", 0)
+
+
+def test_replay_runs_tojioo_nodes_on_synthetic_inputs(tmp_path, monkeypatch):
+	from unittest.mock import MagicMock
+
+	import folder_paths
+	import torch
+
+	from benchmarks.replay import replay_workflow
+	from python import NODE_CLASS_MAPPINGS
+
+	if isinstance(torch, MagicMock) or not isinstance(folder_paths, MagicMock):
+		pytest.skip("requires torch and the stand-in folder_paths")
+	monkeypatch.setattr(folder_paths.get_save_image_path, "return_value", (str(tmp_path), "preview", 0, "", ""))
+
+	report = replay_workflow(_example_workflow(), NODE_CLASS_MAPPINGS, runs = 1, warmup = 0, side = 64)
+	nodes = report["nodes"]
+	assert report["replay"]["nodes"] == len(nodes) == 21
+	assert nodes["470"]["type"] == "PT_AnyImageSwitch" and nodes["470"]["status"] == "ok"
+	assert nodes["470"]["bytes_out"] == 64 * 64 * 3 * 4
+	assert set(report["errors"]) == {"482:79"}
+	assert nodes["482:79"]["status"] == "stubbed"
+	assert report["replay"]["replays_per_s"] > 0
\ No newline at end of file
@@ -25,4 +25,61 @@ def test_log_helpers_do_not_raise():
 	log_info("info message", module = "Test")
 	log_warning("warning message", module = "Test")
 	log_debug("debug message", module = "Test")
-	log_error("error message", module = "Test")
\ No newline at end of file
+	log_error("error message", module = "Test")
+
+
+def test_log_level_follows_setting(monkeypatch):
+	from python.config import settings
+	from python.utils.logger_internal import log_level
+
+	monkeypatch.setattr(settings, "LOG_LEVEL", "warning")
+	assert log_level() == logging.WARNING
+	monkeypatch.setattr(settings, "LOG_LEVEL", "verbose")
+	assert log_level() == logging.INFO
+
+
+def test_records_are_written_by_the_listener_thread(monkeypatch):
+	import threading
+
+	from python.utils import logger_internal
+
+	threads = []
+	monkeypatch.setattr(
+		logger_internal._SafeStreamHandler, "emit", lambda self, record: threads.append((threading.current_thread(), record))
+	)
+	logger_internal.flush()
+
+	logger = get_logger("test_queue")
+	logger.setLevel(logging.INFO)
+	logger.info("value %s", {"a": 1})
+	logger_internal.flush()
+
+	# Other loggers may write through the shared listener at the same time
+	threads = [(thread, record) for thread, record in threads if record.name.endswith("test_queue")]
+	assert len(threads) == 1
+	thread, record = threads[0]
+	assert thread is not threading.current_thread()
+	assert record.getMessage() == "value {'a': 1}"
+
+
+def test_disabled_levels_are_not_formatted():
+	from python.utils import logger_internal
+
+	formatted = []
+
+
+	class Recording:
+		def __str__(self):
+			formatted.append(self)
+			return "recording"
+
+
+	logger = get_logger("test_lazy")
+	logger.setLevel(logging.INFO)
+	logger.debug("value %s", Recording())
+	logger_internal.flush()
+	assert formatted == []
+
+	logger.info("value %s", Recording())
+	logger_internal.flush()
+	assert len(formatted) == 1
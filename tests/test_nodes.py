@@ -3,6 +3,7 @@ from unittest.mock import MagicMock
 import pytest
 
 from python.nodes.base import AnyType, BaseNode, FlexibleOptionalInputType
+from python.nodes.batch_clip_encode import PT_BatchCLIPEncode
 from python.nodes.conditioning import PT_Conditioning
 from python.nodes.dual_clip_encode import PT_DualCLIPEncode
 from python.nodes.dynamic_any import PT_DynamicAny
@@ -10,6 +11,28 @@ from python.nodes.dynamic_bus import PT_DynamicBus
 from python.nodes.dynamic_passthrough import PT_DynamicPassthrough
 from python.nodes.dynamic_preview import PT_DynamicPreview
 from python.nodes.multi_pass import PT_MultiPass
+from python.nodes.tiled_vae_settings import PT_TiledVAESettings
+
+
+class RecordingTransport:
+	"""Stand-in preview transport that keeps the sent images in memory."""
+
+
+	def __init__(self):
+		self.sent = []
+
+
+	def fingerprint(self, img_t):
+		return None
+
+
+	def reuse(self, key, slot_idx):
+		return None
+
+
+	def send(self, img, slot_idx, key = None):
+		self.sent.append(img)
+		return {"slot": slot_idx, "index": len(self.sent) - 1}
 
 
 def test_base_node_defaults():
@@ -231,25 +254,372 @@ def test_dynamic_preview_dict_text():
 	assert '"b"' in text
 
 
-def test_dual_clip_encode_round_trip():
-	class ClipStub:
-
-		@staticmethod
-		def tokenize(text):
-			return f"tokens:{text}"
-
-
-		@staticmethod
-		def encode_from_tokens_scheduled(tokens):
-			return f"cond:{tokens}"
-
-
+def test_dual_clip_encode_round_trip(clip_stub):
 	node = PT_DualCLIPEncode()
-	result = node.run(ClipStub(), "pos", "neg")
+	result = node.run(clip_stub(), "pos", "neg")
 	assert result == ("cond:tokens:pos", "cond:tokens:neg")
 
 
 def test_dual_clip_encode_requires_clip():
 	node = PT_DualCLIPEncode()
 	with pytest.raises(RuntimeError):
-		node.run(None, "pos", "neg")
\ No newline at end of file
+		node.run(None, "pos", "neg")
+
+
+def test_dynamic_preview_websocket_transport(monkeypatch, torch_stub):
+	from python.utils import preview_transport
+
+
+	class ServerStub:
+		client_id = "client"
+
+
+		def __init__(self):
+			self.messages = []
+
+
+		def send_sync(self, event, data, sid = None):
+			self.messages.append((event, data, sid))
+
+
+	server = ServerStub()
+	monkeypatch.setattr(
+		"python.nodes.dynamic_preview.create_preview_transport",
+		lambda *args, **kwargs: preview_transport.WebSocketTransport(server),
+	)
+
+	node = PT_DynamicPreview()
+	result = node.preview_images(input_1 = torch_stub.randn(2, 8, 8, 3))
+	assert result["ui"]["preview_data"] == [
+		{"type": "binary", "slot": 0, "index": 0},
+		{"type": "binary", "slot": 0, "index": 1},
+	]
+	assert len(server.messages) == 2
+	assert all(sid == "client" for _, _, sid in server.messages)
+
+
+def test_preview_transport_falls_back_to_temp_without_server():
+	from python.utils.preview_transport import TempFileTransport, create_preview_transport
+
+	assert isinstance(create_preview_transport(mode = "websocket"), TempFileTransport)
+	assert isinstance(create_preview_transport(mode = "unknown"), TempFileTransport)
+
+
+def test_dynamic_preview_reuses_unchanged_frames(monkeypatch, tmp_path, real_torch):
+	import folder_paths
+	import torch
+	from python.utils.preview_cache import PREVIEW_CACHE
+
+	counter = iter(range(100))
+	monkeypatch.setattr(folder_paths, "get_temp_directory", lambda: str(tmp_path), raising = False)
+	monkeypatch.setattr(
+		folder_paths,
+		"get_save_image_path",
+		lambda *args, **kwargs: (str(tmp_path), "preview", next(counter), "", ""),
+		raising = False,
+	)
+	PREVIEW_CACHE.clear()
+
+	node = PT_DynamicPreview()
+	image = torch.rand(1, 8, 8, 3)
+	first = node.preview_images(input_1 = image)["ui"]["preview_data"]
+	second = node.preview_images(input_2 = image.clone())["ui"]["preview_data"]
+	changed = node.preview_images(input_1 = image + 0.5)["ui"]["preview_data"]
+
+	assert second[0]["filename"] == first[0]["filename"]
+	assert second[0]["slot"] == 0
+	assert changed[0]["filename"] != first[0]["filename"]
+	assert len(list(tmp_path.iterdir())) == 2
+
+	# The embedded workflow is part of the key, so an edited graph gets a fresh file
+	workflow = node.preview_images(prompt = {"1": {"inputs": {}}}, input_1 = image)["ui"]["preview_data"]
+	assert workflow[0]["filename"] != first[0]["filename"]
+	assert node.preview_images(prompt = {"1": {"inputs": {}}}, input_1 = image)["ui"]["preview_data"] == workflow
+
+
+def test_dynamic_preview_scans_temp_directory_once(monkeypatch, torch_stub):
+	from PIL import Image
+	import folder_paths
+	import tempfile
+
+	if not isinstance(Image, MagicMock):
+		monkeypatch.setattr(Image.Image, "save", lambda *args, **kwargs: None, raising = False)
+
+	calls = []
+	temp_dir = tempfile.gettempdir()
+
+
+	def get_save_image_path(*args, **kwargs):
+		calls.append(args)
+		return temp_dir, "scan_once", 3, "", ""
+
+
+	monkeypatch.setattr(folder_paths, "get_temp_directory", lambda: temp_dir, raising = False)
+	monkeypatch.setattr(folder_paths, "get_save_image_path", get_save_image_path, raising = False)
+
+	node = PT_DynamicPreview()
+	result = node.preview_images(prompt = {"1": {}}, input_1 = torch_stub.randn(4, 8, 8, 3))
+	filenames = [entry["filename"] for entry in result["ui"]["preview_data"]]
+	assert len(calls) == 1
+	assert len(set(filenames)) == 4
+
+
+def test_temp_transport_metadata_is_optional():
+	from python.utils.preview_transport import TempFileTransport
+
+	with_metadata = TempFileTransport(prompt = {"1": {}}, cache = None, embed_metadata = True)
+	without_metadata = TempFileTransport(prompt = {"1": {}}, cache = None, embed_metadata = False)
+	assert with_metadata._get_metadata() is with_metadata._get_metadata()
+	assert without_metadata._get_metadata() is None
+
+
+def test_dynamic_preview_tensor_statistics(real_torch):
+	import torch
+
+	values = torch.tensor([[-1.0, 0.0, 1.0, float("nan"), float("inf")]] * 2)
+	node = PT_DynamicPreview()
+	result = node.preview_images(input_1 = {"samples": values.reshape(1, 1, 2, 5)}, input_2 = values.reshape(10))
+
+	latent_entry, tensor_entry = result["ui"]["text_data"]
+	assert latent_entry["text"].startswith("LATENT:")
+	assert tensor_entry["text"].startswith("Tensor:")
+	stats = tensor_entry["stats"]
+	assert (stats["min"], stats["max"]) == (-1.0, 1.0)
+	assert stats["mean"] == pytest.approx(0.0, abs = 1e-12)
+	assert stats["std"] == pytest.approx((2 / 3) ** 0.5)
+	assert (stats["nan"], stats["inf"]) == (2, 2)
+	assert sum(stats["histogram"]) == 6
+
+
+@pytest.mark.parametrize("shape,frames", [((2, 4, 8, 8), 2), ((1, 16, 3, 8, 8), 3), ((4,), 0), ((2, 4, 8), 0)])
+def test_dynamic_preview_latent_as_image(monkeypatch, shape, frames, real_torch):
+	import torch
+
+	transport = RecordingTransport()
+	monkeypatch.setattr("python.nodes.dynamic_preview.create_preview_transport", lambda *args, **kwargs: transport)
+
+	node = PT_DynamicPreview()
+	result = node.preview_images(input_1 = {"samples": torch.randn(*shape)})
+	assert [img.size for img in transport.sent] == [(8, 8)] * frames
+	assert result["ui"]["text_data"][0]["text"].startswith("LATENT:")
+
+
+def test_dynamic_preview_encodes_masks_as_grayscale(monkeypatch):
+	import torch
+	from PIL import Image
+
+	if isinstance(torch, MagicMock) or isinstance(Image, MagicMock):
+		pytest.skip("requires torch and Pillow")
+
+	transport = RecordingTransport()
+	monkeypatch.setattr("python.nodes.dynamic_preview.create_preview_transport", lambda *args, **kwargs: transport)
+
+	masks = torch.zeros(2, 6, 5)
+	masks[1] = 1.0
+	PT_DynamicPreview().preview_images(input_1 = masks)
+	assert [img.mode for img in transport.sent] == ["L", "L"]
+	assert [img.size for img in transport.sent] == [(5, 6)] * 2
+	assert transport.sent[1].getpixel((0, 0)) == 255
+
+
+def test_dual_clip_encode_identical_prompts_encode_once(clip_stub):
+	clip = clip_stub()
+	result = PT_DualCLIPEncode().run(clip, "same", "same")
+	assert result == ("cond:tokens:same", "cond:tokens:same")
+	assert clip.encoded == ["tokens:same"]
+
+
+def test_dual_clip_encode_reuses_cached_conditioning(clip_stub):
+	from types import SimpleNamespace
+
+	from python.utils.conditioning_cache import CONDITIONING_CACHE
+
+	CONDITIONING_CACHE.clear()
+	clip = clip_stub(
+		encode = lambda tokens: [[tokens, {}]],
+		cond_stage_model = SimpleNamespace(),
+		patcher = SimpleNamespace(patches_uuid = "base"),
+	)
+	first = PT_DualCLIPEncode().run(clip, "cat", "blurry")
+	second = PT_DualCLIPEncode().run(clip, "cat", "blurry")
+	assert first == second
+	assert clip.encoded == ["tokens:cat", "tokens:blurry"]
+
+	# A new LoRA patch set changes the encoder identity
+	clip.patcher.patches_uuid = "lora"
+	PT_DualCLIPEncode().run(clip, "cat", "blurry")
+	assert len(clip.encoded) == 4
+	CONDITIONING_CACHE.clear()
+
+
+def test_dual_clip_encode_loads_conditioning_from_disk(monkeypatch, tmp_path, real_torch, clip_stub):
+	from types import SimpleNamespace
+
+	import torch
+
+	from python.config import settings
+	from python.utils.conditioning_cache import CONDITIONING_CACHE
+	from python.utils.conditioning_disk_cache import ConditioningDiskCache
+
+
+	def make_clip():
+		torch.manual_seed(0)
+		return clip_stub(
+			tokenize = lambda text: text,
+			encode = lambda tokens: [[torch.full((1, 2, 4), float(len(tokens))), {"pooled_output": torch.ones(1, 4), "guidance": 3.5}]],
+			cond_stage_model = torch.nn.Linear(4, 4),
+			patcher = SimpleNamespace(patches_uuid = object(), patches = {}),
+		)
+
+
+	monkeypatch.setattr(settings, "COND_DISK_CACHE", True)
+	monkeypatch.setattr(
+		"python.nodes.dual_clip_encode.CONDITIONING_DISK_CACHE", ConditioningDiskCache(1 << 20, str(tmp_path))
+	)
+	CONDITIONING_CACHE.clear()
+	first = make_clip()
+	expected = PT_DualCLIPEncode().run(first, "a cat", "blurry")
+	assert len(list(tmp_path.glob("*.safetensors"))) == 2
+
+	# A fresh process holds an equal model under a new identity
+	CONDITIONING_CACHE.clear()
+	second = make_clip()
+	loaded = PT_DualCLIPEncode().run(second, "a cat", "blurry")
+	assert second.encoded == []
+	for want, got in zip(expected, loaded):
+		assert torch.equal(want[0][0], got[0][0])
+		assert torch.equal(want[0][1]["pooled_output"], got[0][1]["pooled_output"])
+		assert got[0][1]["guidance"] == 3.5
+	CONDITIONING_CACHE.clear()
+
+
+def test_batch_clip_encode_keeps_prompt_order(tmp_path, monkeypatch, clip_stub):
+	import comfy.model_management
+	import folder_paths
+
+	checks = []
+	monkeypatch.setattr(comfy.model_management, "throw_exception_if_processing_interrupted", lambda: checks.append(1), raising = False)
+	monkeypatch.setattr(folder_paths, "get_input_directory", lambda: str(tmp_path), raising = False)
+	(tmp_path / "prompts.txt").write_text("a tall red house\n\nshort\n", encoding = "utf-8")
+
+	clip = clip_stub(tokenize = lambda text: {"l": [text.split()]}, encode = lambda tokens: f"cond:{' '.join(tokens['l'][0])}")
+	conds, texts = PT_BatchCLIPEncode().run(clip, "a cat\nshort\n  a cat  ", 2, "prompts.txt")
+	assert texts == ["a cat", "short", "a cat", "a tall red house", "short"]
+	assert conds == [f"cond:{t}" for t in texts]
+	# Each distinct prompt is encoded once, in order, with an interruption check every 2 prompts
+	assert [" ".join(tokens["l"][0]) for tokens in clip.encoded] == ["a cat", "short", "a tall red house"]
+	assert len(checks) == 2
+
+
+def test_batch_clip_encode_rejects_files_outside_input_directory(tmp_path, monkeypatch):
+	import folder_paths
+
+	inputs = tmp_path / "input"
+	inputs.mkdir()
+	secret = tmp_path / "secret.txt"
+	secret.write_text("token\n", encoding = "utf-8")
+	monkeypatch.setattr(folder_paths, "get_input_directory", lambda: str(inputs), raising = False)
+	monkeypatch.setattr(folder_paths, "get_user_directory", lambda: str(inputs), raising = False)
+
+	for name in (str(secret), "../secret.txt"):
+		with pytest.raises(ValueError):
+			PT_BatchCLIPEncode().run(object(), "a cat", 4, name)
+
+	# A file on another Windows drive has no common path with the input directory
+	def other_drive(paths):
+		raise ValueError("Paths don't have the same drive")
+
+
+	monkeypatch.setattr("os.path.commonpath", other_drive)
+	with pytest.raises(ValueError, match = "not a file inside"):
+		PT_BatchCLIPEncode().run(object(), "a cat", 4, str(secret))
+
+
+def test_batch_clip_encode_requires_prompts():
+	with pytest.raises(ValueError):
+		PT_BatchCLIPEncode().run(object(), "\n  \n", 4)
+
+
+def test_tiled_vae_settings_manual_passthrough():
+	assert PT_TiledVAESettings.run(512, 64, 64, 8) == (512, 64, 64, 8)
+	assert PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto") == (512, 64, 64, 8)
+
+
+def test_tiled_vae_settings_auto_from_latent(monkeypatch):
+	from types import SimpleNamespace
+
+	from python.config import settings
+
+	monkeypatch.setattr(settings, "TILED_VAE_BUDGET_MB", 64 * 1024)
+	image_latent = {"samples": SimpleNamespace(shape = (1, 4, 128, 96))}
+	tile_size, overlap, temporal_size, temporal_overlap = PT_TiledVAESettings.run(
+		512, 64, 64, 8, mode = "auto", latent = image_latent
+	)
+	assert (tile_size, temporal_size, temporal_overlap) == (1024, 64, 8)
+	assert overlap == 128
+
+	# 21 latent frames decode to 81 video frames
+	video_latent = {"samples": SimpleNamespace(shape = (1, 16, 21, 60, 104))}
+	monkeypatch.setattr(settings, "TILED_VAE_BUDGET_MB", 1024)
+	tile_size, _, temporal_size, _ = PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto", latent = video_latent)
+	assert tile_size < 832
+	assert 8 <= temporal_size <= 84
+
+
+def test_tiled_vae_settings_image_batch_is_not_video(monkeypatch):
+	from types import SimpleNamespace
+
+	from python.config import settings
+
+	monkeypatch.setattr(settings, "TILED_VAE_BUDGET_MB", 1024)
+	single = SimpleNamespace(shape = (1, 1024, 1024, 3))
+	batch = SimpleNamespace(shape = (8, 1024, 1024, 3))
+	image_vae = SimpleNamespace(temporal_compression_decode = lambda: None)
+	video_vae = SimpleNamespace(temporal_compression_decode = lambda: 4)
+
+	# Image VAEs decode batch items one at a time, so the batch size does not shrink the tiles
+	expected = PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto", image = single)
+	assert PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto", image = batch) == expected
+	assert PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto", image = batch, vae = image_vae) == expected
+	tile_size, _, temporal_size, _ = PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto", image = batch, vae = video_vae)
+	assert temporal_size == 8 and tile_size < expected[0]
+
+
+def test_tiled_vae_settings_auto_prefers_calibrated_profile(monkeypatch, stand_in_vae, tmp_path):
+	import torch
+
+	from python.utils import tile_calibration
+
+	path = str(tmp_path / "profile.json")
+	monkeypatch.setattr(tile_calibration, "profile_path", lambda: path)
+	tile_calibration.save_profile({
+		tile_calibration.vae_fingerprint(stand_in_vae): {
+			"512x512": {"tile_size": 192, "overlap": 32, "temporal_size": 64, "temporal_overlap": 8},
+		},
+	})
+
+	latent = {"samples": torch.zeros(1, 4, 64, 64)}
+	assert PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto", latent = latent, vae = stand_in_vae) == (192, 32, 64, 8)
+
+	# A batch of images decoded by an image VAE is looked up in the single-frame bucket
+	images = torch.zeros(8, 512, 512, 3)
+	assert PT_TiledVAESettings.run(512, 64, 64, 8, mode = "auto", image = images, vae = stand_in_vae) == (192, 32, 64, 8)
+
+
+def test_dynamic_preview_latent_uses_model_latent_format(monkeypatch, real_torch):
+	import torch
+	from types import SimpleNamespace
+
+	from python.utils.latent_preview import latent_to_rgb
+
+	# SD1.5 and SDXL share 4 channels but not their factors
+	sd15 = SimpleNamespace(latent_rgb_factors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0], [0.0, 0.0, 0.0]])
+	samples = torch.full((1, 4, 2, 2), 0.5)
+	assert torch.allclose(latent_to_rgb(samples, sd15)[0, 0, 0], torch.tensor([0.75, 0.75, 0.75]))
+	assert not torch.allclose(latent_to_rgb(samples)[0, 0, 0], torch.tensor([0.75, 0.75, 0.75]))
+
+	transport = RecordingTransport()
+	monkeypatch.setattr("python.nodes.dynamic_preview.create_preview_transport", lambda *args, **kwargs: transport)
+	model = SimpleNamespace(model = SimpleNamespace(latent_format = sd15))
+	PT_DynamicPreview().preview_images(input_1 = {"samples": samples}, input_2 = model)
+	assert transport.sent[0].getpixel((0, 0)) == (191, 191, 191)
\ No newline at end of file
@@ -1,5 +1,7 @@
 import sys
 
+import pytest
+
 from python.utils.wsl_patch import apply_wsl_safetensors_patch
 
 
@@ -10,4 +12,581 @@ def test_patch_applies_without_error():
 def test_patch_handles_missing_safetensors(monkeypatch):
 	monkeypatch.delitem(sys.modules, "safetensors", raising = False)
 	monkeypatch.delitem(sys.modules, "safetensors.torch", raising = False)
-	apply_wsl_safetensors_patch()
\ No newline at end of file
+	apply_wsl_safetensors_patch()
+
+
+def _write_safetensors(tmp_path):
+	from unittest.mock import MagicMock
+
+	import torch
+
+	if isinstance(torch, MagicMock):
+		pytest.skip("requires torch and safetensors")
+	import safetensors.torch
+
+	tensors = {
+		"weight": torch.randn(3, 5, dtype = torch.bfloat16),
+		"index": torch.arange(7, dtype = torch.int64),
+		"empty": torch.zeros(0, 4),
+		"flag": torch.tensor([True, False]),
+		"scalar": torch.tensor(3.0),
+		"large": torch.randn(3000, dtype = torch.float64),
+	}
+	path = str(tmp_path / "model.safetensors")
+	safetensors.torch.save_file(tensors, path)
+	return path, tensors
+
+
+@pytest.mark.parametrize("strategy", ["mmap", "parallel"])
+def test_loaders_match_safetensors(tmp_path, strategy):
+	import torch
+
+	from python.utils import safetensors_loader
+
+	path, expected = _write_safetensors(tmp_path)
+	if strategy == "parallel":
+		# Page-sized chunks split the larger tensors across several reads
+		loaded = safetensors_loader.load_parallel(path, workers = 3, chunk_size = 1)
+	else:
+		loaded = safetensors_loader.load_mmap(path)
+	assert loaded.keys() == expected.keys()
+	for name, tensor in expected.items():
+		assert loaded[name].dtype == tensor.dtype
+		assert torch.equal(loaded[name], tensor)
+
+
+def test_loaders_without_positioned_reads(monkeypatch, tmp_path):
+	import torch
+
+	from python.config import settings
+	from python.utils import safetensors_loader
+
+	# Windows has neither os.pread nor os.preadv
+	monkeypatch.delattr("os.pread", raising = False)
+	monkeypatch.delattr("os.preadv", raising = False)
+	path, expected = _write_safetensors(tmp_path)
+
+	lazy = safetensors_loader.LazyStateDict(path)
+	loaded = safetensors_loader.load_parallel(path, workers = 3, chunk_size = 1)
+	for name, tensor in expected.items():
+		assert torch.equal(lazy[name], tensor)
+		assert torch.equal(loaded[name], tensor)
+
+	assert safetensors_loader.strategy_for_filesystem("9p") == "bulk"
+	monkeypatch.setattr(settings, "LOADER_STRATEGY", "parallel")
+	assert safetensors_loader.select_strategy(path) == "bulk"
+
+
+def test_lazy_state_dict_reads_tensors_on_access(monkeypatch, tmp_path):
+	import torch
+
+	from python.config import settings
+	from python.utils.safetensors_loader import LazyStateDict
+
+	path, expected = _write_safetensors(tmp_path)
+	monkeypatch.setattr(settings, "LOADER_LAZY", True)
+	apply_wsl_safetensors_patch()
+	import safetensors.torch
+
+	lazy = safetensors.torch.load_file(path)
+	assert isinstance(lazy, LazyStateDict)
+	assert set(lazy) == set(expected) and lazy.loaded_keys == []
+
+	assert torch.equal(lazy["weight"], expected["weight"])
+	assert lazy.loaded_keys == ["weight"]
+
+	del lazy["large"]
+	lazy["extra"] = torch.ones(2)
+	assert "large" not in lazy and len(lazy) == len(expected)
+	for name in ("index", "empty", "flag", "scalar"):
+		assert torch.equal(lazy[name], expected[name])
+	assert lazy._fd is None
+
+
+def test_patched_loader_caches_state_dicts(monkeypatch, tmp_path):
+	import os
+
+	import torch
+
+	from python.config import settings
+	from python.utils import wsl_patch
+	from python.utils.state_dict_cache import StateDictCache
+
+	path, expected = _write_safetensors(tmp_path)
+	cache = StateDictCache(max_bytes = 1 << 20)
+	monkeypatch.setattr(wsl_patch, "STATE_DICT_CACHE", cache)
+	monkeypatch.setattr(settings, "LOADER_LAZY", False)
+	monkeypatch.setattr(settings, "LOADER_STRATEGY", "bulk")
+	apply_wsl_safetensors_patch()
+	import safetensors.torch
+
+	first = safetensors.torch.load_file(path)
+	first.pop("weight")
+	second = safetensors.torch.load_file(path)
+	assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+	assert second["index"] is first["index"]
+	assert torch.equal(second["weight"], expected["weight"])
+
+	# A rewritten file is a different key
+	stat = os.stat(path)
+	os.utime(path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+	safetensors.torch.load_file(path)
+	assert cache.stats()["misses"] == 2 and len(cache) == 2
+
+
+def test_patched_loader_records_load_metrics(monkeypatch, tmp_path):
+	import os
+
+	from python.config import settings
+	from python.utils import wsl_patch
+	from python.utils.metrics import MetricsRegistry
+
+	path, _ = _write_safetensors(tmp_path)
+	metrics = MetricsRegistry(capacity = 4)
+	monkeypatch.setattr(wsl_patch, "METRICS", metrics)
+	monkeypatch.setattr(settings, "LOADER_LAZY", False)
+	apply_wsl_safetensors_patch()
+	import safetensors.torch
+
+	for strategy in ("bulk", "parallel", "native"):
+		monkeypatch.setattr(settings, "LOADER_STRATEGY", strategy)
+		safetensors.torch.load_file(path)
+
+	records = metrics.records("safetensors_load")
+	assert [r["strategy"] for r in records] == ["bulk", "parallel", "native"]
+	assert all(r["size_bytes"] == os.path.getsize(path) and r["mb_per_s"] > 0 for r in records)
+	assert records[0]["ttfb_s"] is not None and records[2]["ttfb_s"] is None
+
+
+def test_metrics_registry_keeps_latest_records():
+	import json
+
+	from python.utils.metrics import MetricsRegistry
+
+	metrics = MetricsRegistry(capacity = 2)
+	for i in range(3):
+		metrics.record("load", index = i)
+	assert [r["index"] for r in metrics.records("load")] == [1, 2]
+	assert [r["index"] for r in json.loads(metrics.to_json())["load"]] == [1, 2]
+	metrics.clear("load")
+	assert metrics.records("load") == []
+
+
+def test_state_dict_cache_evicts_by_bytes():
+	from python.utils.state_dict_cache import StateDictCache
+
+
+	class Tensor:
+
+		def __init__(self, nbytes):
+			self.nbytes = nbytes
+
+
+		def element_size(self):
+			return 1
+
+
+		def numel(self):
+			return self.nbytes
+
+
+	cache = StateDictCache(max_bytes = 100)
+	cache.put("a", {"w": Tensor(60)})
+	cache.put("b", {"w": Tensor(60)})
+	cache.put("huge", {"w": Tensor(101)})
+	assert cache.get("a") is None and cache.get("huge") is None
+	assert cache.get("b") is not None
+	assert cache.nbytes == 60
+
+
+def test_patch_is_idempotent(tmp_path):
+	import torch
+
+	path, expected = _write_safetensors(tmp_path)
+	import safetensors.torch
+
+	apply_wsl_safetensors_patch()
+	first = safetensors.torch.load_file
+	apply_wsl_safetensors_patch()
+	assert safetensors.torch.load_file._tojioo_original is first._tojioo_original
+	assert torch.equal(safetensors.torch.load_file(path)["weight"], expected["weight"])
+
+
+def test_mount_for_picks_longest_mount_point():
+	from python.utils.mounts import mount_for, parse_mountinfo
+
+	mounts = parse_mountinfo(
+		"22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sdb rw\n"
+		"40 22 0:50 / /mnt/c rw,noatime - 9p drvfs rw,aname=drvfs\n"
+		"41 22 0:51 / /mnt/my\\040models rw shared:5 master:2 - fuse.sshfs host: rw\n"
+	)
+	assert mounts == [("/", "ext4"), ("/mnt/c", "9p"), ("/mnt/my models", "fuse.sshfs")]
+	assert mount_for("/mnt/c/models/a.safetensors", mounts) == ("/mnt/c", "9p")
+	assert mount_for("/mnt/cache/a.safetensors", mounts) == ("/", "ext4")
+	assert mount_for("/mnt/my models/a.safetensors", mounts) == ("/mnt/my models", "fuse.sshfs")
+
+
+def test_select_strategy_by_filesystem(monkeypatch):
+	from python.config import settings
+	from python.utils import safetensors_loader
+
+	monkeypatch.setattr(settings, "LOADER_STRATEGY", "auto")
+	monkeypatch.setattr(safetensors_loader, "_directory_strategies", {})
+	mounts = {"/mnt/c": ("/mnt/c", "9p"), "/models": ("/", "ext4")}
+	looked_up = []
+	monkeypatch.setattr(safetensors_loader, "mount_for", lambda path: looked_up.append(path) or mounts[path])
+	assert safetensors_loader.select_strategy("/mnt/c/model.safetensors") == "parallel"
+	assert safetensors_loader.select_strategy("/models/model.safetensors") == "native"
+	assert safetensors_loader.strategy_for_filesystem("fuseblk") == "bulk"
+
+	# The mount table is only consulted once per directory
+	assert safetensors_loader.select_strategy("/mnt/c/other.safetensors") == "parallel"
+	assert looked_up == ["/mnt/c", "/models"]
+
+	monkeypatch.setattr(settings, "LOADER_STRATEGY", "bulk")
+	assert safetensors_loader.select_strategy("/models/model.safetensors") == "bulk"
+
+
+def test_format_value_matches_json_for_small_values():
+	import json
+
+	from python.utils.text_format import format_value
+
+	value = {"a": 1, "b": [2, 3.5, None], "c": {"d": "text", "e": True}, "f": []}
+	assert format_value(value, 2000) == json.dumps(value, indent = 2)
+
+
+def test_format_value_stops_at_budget_and_summarizes_rest():
+	from python.utils.text_format import format_value
+
+	text = format_value({"items": list(range(1_000_000)), "other": 1}, 200)
+	body, note = text.rsplit("\n... (truncated", 1)
+	assert len(body) == 200
+	assert "more items in list" in note
+	assert "1 more keys in dict" in note
+
+
+def test_format_value_summarizes_deep_and_shaped_values():
+	from python.utils.text_format import format_value
+
+
+	class Shaped:
+		shape = (2, 3)
+		dtype = "float32"
+
+
+	text = format_value({"deep": [[[1]]], "tensor": Shaped()}, 2000, max_depth = 2)
+	assert "<list of 1 items>" in text
+	assert "<Shaped shape=[2, 3] dtype=float32>" in text
+
+
+def test_preview_writer_runs_jobs_in_background():
+	import threading
+
+	from python.utils.preview_writer import PreviewWriter
+
+	writer = PreviewWriter(max_pending = 1)
+	results = []
+	writer.submit(lambda: results.append(threading.current_thread().name))
+	writer.submit(results.append, "second")
+	writer.flush()
+	assert results == ["TojiooPreviewWriter", "second"]
+
+
+def test_temp_transport_writes_asynchronously(monkeypatch, tmp_path):
+	from unittest.mock import MagicMock
+
+	import folder_paths
+	from PIL import Image
+
+	from python.utils.preview_transport import TempFileTransport
+	from python.utils.preview_writer import PreviewWriter
+
+	if isinstance(Image, MagicMock):
+		pytest.skip("requires Pillow")
+
+	monkeypatch.setattr(folder_paths, "get_temp_directory", lambda: str(tmp_path), raising = False)
+	monkeypatch.setattr(
+		folder_paths, "get_save_image_path", lambda *args, **kwargs: (str(tmp_path), "async", 0, "", ""), raising = False
+	)
+
+	writer = PreviewWriter(max_pending = 2)
+	transport = TempFileTransport(cache = None, writer = writer)
+	entries = [transport.send(Image.new("RGB", (4, 4)), 0) for _ in range(3)]
+	writer.flush()
+	assert sorted(p.name for p in tmp_path.iterdir()) == sorted(e["filename"] for e in entries)
+	# Each entry reports the writes queued up to and including its own
+	assert all(1 <= e["pending"] <= 3 for e in entries)
+	assert writer.pending() == 0
+
+
+def test_conditioning_cache_evicts_by_bytes(real_torch):
+	import torch
+
+	from python.utils.conditioning_cache import ConditioningCache
+
+	cache = ConditioningCache(max_bytes = 1024)
+	cond = lambda: [[torch.zeros(128), {"pooled_output": torch.zeros(64)}]]  # 768 bytes
+	cache.put("a", cond())
+	cache.put("b", cond())
+	assert cache.get("a") is None
+	assert cache.get("b") is not None
+	assert cache.nbytes == 768
+	assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_conditioning_cache_rejects_reused_owner_id():
+	from python.utils.conditioning_cache import ConditioningCache
+
+
+	class Owner:
+		pass
+
+
+	cache = ConditioningCache(max_bytes = 1024)
+	owner = Owner()
+	cache.put("key", "cond", owner = owner)
+	assert cache.get("key", owner = owner) == "cond"
+	assert cache.get("key", owner = Owner()) is None
+	assert len(cache) == 0
+
+
+def test_conditioning_disk_cache_evicts_least_recently_used(tmp_path, real_torch):
+	import torch
+
+	from python.utils.conditioning_disk_cache import ConditioningDiskCache
+
+	cond = [[torch.zeros(1, 64), {}]]
+	cache = ConditioningDiskCache(max_bytes = 700, directory = str(tmp_path))
+	cache.put("model", "first", cond)
+	cache.put("model", "second", cond)
+	assert cache.get("model", "first") is None
+	assert torch.equal(cache.get("model", "second")[0][0], cond[0][0])
+	assert cache.get("other", "second") is None
+
+	# Entries written earlier are found again after a restart
+	assert ConditioningDiskCache(max_bytes = 700, directory = str(tmp_path)).get("model", "second") is not None
+
+
+def test_conditioning_disk_cache_keeps_hits_across_restarts(tmp_path, real_torch):
+	import torch
+
+	from python.utils.conditioning_disk_cache import ConditioningDiskCache
+
+	cond = [[torch.zeros(1, 64), {}]]
+	cache = ConditioningDiskCache(max_bytes = 1 << 20, directory = str(tmp_path))
+	cache.put("model", "first", cond)
+	cache.put("model", "second", cond)
+	size = max(p.stat().st_size for p in tmp_path.glob("*.safetensors"))
+	assert cache.get("model", "first") is not None
+	cache.flush()
+
+	# The hit on "first" survives the restart, so "second" is the least recently used entry
+	restarted = ConditioningDiskCache(max_bytes = size * 5 // 2, directory = str(tmp_path))
+	restarted.put("model", "third", cond)
+	assert restarted.get("model", "first") is not None
+	assert restarted.get("model", "second") is None
+
+
+def test_clip_fingerprint_covers_every_weight(real_torch):
+	from types import SimpleNamespace
+
+	import torch
+
+	from python.utils.conditioning_cache import clip_fingerprint
+
+
+	def make_clip():
+		torch.manual_seed(0)
+		model = torch.nn.Sequential(*[torch.nn.Linear(8, 8) for _ in range(32)])
+		return SimpleNamespace(cond_stage_model = model, patcher = SimpleNamespace(patches_uuid = object(), patches = {}))
+
+
+	base, merged = make_clip(), make_clip()
+	with torch.no_grad():
+		merged.cond_stage_model[17].bias[3] += 1e-3
+	assert clip_fingerprint(base) == clip_fingerprint(make_clip())
+	assert clip_fingerprint(base) != clip_fingerprint(merged)
+
+
+def test_plan_tiles_fits_budget_with_fewest_tiles():
+	from python.utils.tile_planner import BYTES_PER_PIXEL, plan_tiles
+
+	# Whole image fits: a single tile just covering it
+	plan = plan_tiles(500, 700, budget = 500 * 700 * BYTES_PER_PIXEL)
+	assert plan["tile_size"] == 704
+
+	budget = 512 * 512 * BYTES_PER_PIXEL
+	plan = plan_tiles(2048, 2048, budget = budget)
+	assert plan["tile_size"] ** 2 * BYTES_PER_PIXEL <= budget
+	assert plan["overlap"] <= plan["tile_size"] // 4
+
+
+def test_plan_tiles_splits_video_frames():
+	from python.utils.tile_planner import BYTES_PER_PIXEL, plan_tiles
+
+	budget = 256 * 256 * 16 * BYTES_PER_PIXEL
+	plan = plan_tiles(256, 256, frames = 81, budget = budget)
+	assert plan["tile_size"] == 256
+	assert plan["temporal_size"] == 16
+	assert plan["temporal_overlap"] < plan["temporal_size"]
+
+
+def test_tile_calibration_saves_pareto_best(stand_in_vae, tmp_path):
+	from python.utils.tile_calibration import calibrate, load_profile, lookup, resolution_bucket
+
+	path = str(tmp_path / "profile.json")
+	best = calibrate(stand_in_vae, 256, 320, tile_sizes = (128, 256), overlaps = (32, 64), budget = 1 << 40, path = path)
+
+	# 128 allows only a 32 overlap; 320 is clamped to the output size
+	assert {(r["tile_size"], r["overlap"]) for r in best["results"]} == {(128, 32), (256, 32), (256, 64)}
+	chosen = {k: v for k, v in best.items() if k not in ("results", "pareto")}
+	assert chosen in best["pareto"]
+	assert lookup(stand_in_vae, 250, 300, path = path) == {
+		"tile_size": best["tile_size"],
+		"overlap": best["overlap"],
+		"temporal_size": 64,
+		"temporal_overlap": 8,
+	}
+	assert list(load_profile(path).values())[0].keys() == {resolution_bucket(256, 320)}
+
+
+def test_pareto_front_drops_dominated_results():
+	from python.utils.tile_calibration import pareto_front
+
+	results = [
+		{"pixels_per_second": 10, "peak_bytes": 100},
+		{"pixels_per_second": 5, "peak_bytes": 50},
+		{"pixels_per_second": 4, "peak_bytes": 60},
+	]
+	assert pareto_front(results) == results[:2]
+
+
+def test_vae_fingerprint_is_memoized_per_model_and_patches(stand_in_vae):
+	from types import SimpleNamespace
+	from unittest.mock import patch
+
+	from python.utils.tile_calibration import vae_fingerprint
+
+	model = stand_in_vae.first_stage_model
+	stand_in_vae.patcher = SimpleNamespace(patches_uuid = "a")
+	with patch.object(type(model), "state_dict", autospec = True, side_effect = type(model).state_dict) as state_dict:
+		first = vae_fingerprint(stand_in_vae)
+		assert vae_fingerprint(stand_in_vae) == first
+		assert state_dict.call_count == 1
+
+		stand_in_vae.patcher.patches_uuid = "b"
+		vae_fingerprint(stand_in_vae)
+		assert state_dict.call_count == 2
+
+
+def test_node_profiler_wraps_generated_and_static_nodes(monkeypatch, real_torch):
+	import torch
+
+	from python.controllers.passthrough_controller import PassthroughController
+	from python.utils import node_profiler
+	from python.utils.metrics import MetricsRegistry
+
+
+	class StaticNode:
+		FUNCTION = "run"
+
+
+		@staticmethod
+		def run(value):
+			return (value * 2,)
+
+
+	metrics = MetricsRegistry(capacity = 16)
+	monkeypatch.setattr(node_profiler, "METRICS", metrics)
+	generated = PassthroughController.create_nodes()
+	mappings = {"PT_Image": generated["PT_Image"], "StaticNode": StaticNode}
+	assert node_profiler.install_node_profiler(mappings) == 2
+	assert node_profiler.install_node_profiler(mappings) == 0
+
+	image = torch.zeros(1, 8, 8, 3)
+	assert generated["PT_Image"]().run(image = image)[0] is image
+	assert torch.equal(StaticNode.run(torch.ones(4))[0], torch.full((4,), 2.0))
+
+	records = metrics.records("node_profile")
+	assert [r["node_type"] for r in records] == ["PT_Image", "StaticNode"]
+	assert records[0]["bytes_in"] == records[0]["bytes_out"] == image.numel() * 4
+	assert records[1]["bytes_out"] == 16
+	assert set(node_profiler.summarize(records)) == {"PT_Image", "StaticNode"}
+
+
+def test_call_peak_memory_measures_one_call_without_threads(real_torch):
+	import threading
+
+	from python.utils import metrics
+
+	if not metrics._reset_peak_rss():
+		pytest.skip("the kernel peak RSS mark cannot be reset on this platform")
+
+	parts = [real_torch.ones(25 << 18), real_torch.ones(25 << 18)]
+	threads = threading.active_count()
+	with metrics.CallPeakMemory() as peak:
+		assert threading.active_count() == threads
+		# Torch CPU tensors bypass the Python allocator, a short-lived 50 MiB result must still count
+		joined = real_torch.cat(parts)
+		del joined
+	assert peak.peak_bytes >= 40 << 20
+	assert peak.cuda_peak_bytes == 0
+
+
+def test_edge_tracer_records_routing_outputs_and_ranks_edges(monkeypatch, real_torch):
+	import torch
+
+	from python.controllers.passthrough_controller import PassthroughController
+	from python.utils import edge_tracer
+
+
+	class OtherNode:
+		CATEGORY = "Somewhere Else"
+		FUNCTION = "run"
+
+
+		def run(self, value):
+			return (value,)
+
+
+	traces = edge_tracer.EdgeTraces(capacity = 16)
+	monkeypatch.setattr(edge_tracer, "EDGE_TRACES", traces)
+	generated = PassthroughController.create_nodes()
+	mappings = {"PT_Image": generated["PT_Image"], "PT_Latent": generated["PT_Latent"], "OtherNode": OtherNode}
+	assert edge_tracer.install_edge_tracer(mappings) == 2
+
+	image = torch.zeros(1, 8, 8, 3)
+	latent = {"samples": torch.zeros(1, 4, 2, 2, dtype = torch.float16)}
+	generated["PT_Image"]().run(image = image)
+	generated["PT_Latent"]().run(latent = latent)
+	OtherNode().run(image)
+
+	records = traces.records(traces.latest_prompt())
+	assert [r["node_type"] for r in records] == ["PT_Image", "PT_Latent"]
+	assert records[0]["shape"] == [1, 8, 8, 3] and records[0]["dtype"] == "torch.float32"
+	assert records[0]["device"] == "cpu" and records[0]["slot"] == 0
+	assert records[1]["python_type"] == "dict" and records[1]["bytes"] == 32
+
+	report = edge_tracer.edge_report(records = records)
+	assert report["edges"] == 2
+	assert report["total_bytes"] == image.numel() * 4 + 32
+	assert [r["node_type"] for r in report["heaviest"]] == ["PT_Image", "PT_Latent"]
+	assert edge_tracer.edge_report(records = records, top = 1)["heaviest"][0]["bytes"] == image.numel() * 4
+	assert edge_tracer.edge_report()["total_bytes"] == report["total_bytes"]
+
+
+def test_edge_traces_keep_each_prompt_apart():
+	from python.utils.edge_tracer import EdgeTraces
+
+	traces = EdgeTraces(capacity = 3, prompts = 2)
+	for i in range(5):
+		traces.record("a", index = i)
+	traces.record("b", index = 0)
+	assert [r["index"] for r in traces.records("a")] == [2, 3, 4]
+	assert traces.dropped("a") == 2 and traces.records("b")[0]["index"] == 0
+
+	# A third prompt evicts the oldest one, not the latest edges of the others
+	traces.record("c", index = 0)
+	assert traces.records("a") == [] and traces.dropped("a") == 0
+	assert traces.latest_prompt() == "c" and len(traces.records("b")) == 1
\ No newline at end of file
@@ -31,6 +31,13 @@ function IsNodes2Mode() {
   }
   return false;
 }
+function GetComfyApi() {
+  if (typeof window === "undefined") {
+    return null;
+  }
+  const w = window;
+  return w.comfyAPI?.api?.api ?? w.app?.api ?? null;
+}
 const ANY_TYPE$3 = "*";
 function GetGraph(node) {
   return (node.rootGraph ?? node.graph) || window.app?.graph;
@@ -1432,6 +1439,38 @@ function configureDynamicPreview() {
       if (nodeData?.name !== "PT_DynamicPreview") {
         return;
       }
+      const binaryFrames = { nodeId: null, frames: [] };
+      const comfyApi = GetComfyApi();
+      comfyApi?.addEventListener?.("executing", (e) => {
+        const detail = e.detail;
+        binaryFrames.nodeId = detail == null ? null : String(typeof detail === "object" ? detail.node : detail);
+        binaryFrames.frames = [];
+      });
+      comfyApi?.addEventListener?.("b_preview", (e) => {
+        if (binaryFrames.nodeId != null && e.detail instanceof Blob) {
+          binaryFrames.frames.push(e.detail);
+        }
+      });
+      function takeBinaryFrames(node) {
+        const id = binaryFrames.nodeId;
+        if (id == null || id !== String(node.id) && !id.endsWith(`:${node.id}`)) {
+          return [];
+        }
+        const frames = binaryFrames.frames;
+        binaryFrames.frames = [];
+        return frames;
+      }
+      function clearCorePreview(node) {
+        const previews = window.app?.nodePreviewImages;
+        if (!previews) {
+          return;
+        }
+        for (const key of [String(node.id), binaryFrames.nodeId]) {
+          if (key != null && previews[key]) {
+            delete previews[key];
+          }
+        }
+      }
       nodeType.prototype._currentImageIndex = 0;
       nodeType.prototype._previewItems = [];
       nodeType.prototype._totalImages = 0;
@@ -1502,6 +1541,23 @@ function configureDynamicPreview() {
         }
         GetGraph(node)?.setDirtyCanvas?.(true, true);
       }
+      function retryTempImage(img) {
+        if (typeof img.src !== "string" || !img.src.includes("/view?")) {
+          return;
+        }
+        const pending = Number(img.dataset?.pending ?? 0) || 0;
+        const deadline = Date.now() + 3e3 + 1e3 * pending;
+        let tries = 0;
+        img.onerror = () => {
+          if (Date.now() > deadline) {
+            img.onerror = null;
+            return;
+          }
+          tries++;
+          const base = img.src.replace(/&retry=\d+$/, "");
+          setTimeout(() => img.src = `${base}&retry=${tries}`, Math.min(200 * tries, 1e3));
+        };
+      }
       function createPreviewWidget(node) {
         if (node._previewContainer) {
           return;
@@ -1637,6 +1693,7 @@ function configureDynamicPreview() {
             padding: "0"
           });
           const img = item.element.cloneNode(true);
+          retryTempImage(img);
           Object.assign(img.style, {
             maxWidth: "100%",
             maxHeight: "100%",
@@ -1710,15 +1767,41 @@ function configureDynamicPreview() {
         const textEntries = message?.text_data ?? [];
         const previewItems = [];
         const slotContent = /* @__PURE__ */ new Map();
+        let frames = [];
+        if (images.some((i) => i?.type === "binary")) {
+          clearCorePreview(node);
+          frames = takeBinaryFrames(node);
+          if (frames.length === 0) {
+            frames = node._previewBlobs ?? [];
+          }
+        }
+        node._previewBlobs = frames;
+        for (const url of node._previewObjectUrls ?? []) {
+          URL.revokeObjectURL(url);
+        }
+        node._previewObjectUrls = [];
         for (const imgInfo of images) {
           const slot = imgInfo.slot ?? 0;
+          const img = new Image();
+          if (imgInfo.type === "binary") {
+            const blob = frames[imgInfo.index ?? -1];
+            if (!blob) {
+              continue;
+            }
+            const url = URL.createObjectURL(blob);
+            node._previewObjectUrls.push(url);
+            img.src = url;
+          } else {
+            img.src = `/view?filename=${encodeURIComponent(imgInfo.filename)}&subfolder=${encodeURIComponent(
+              imgInfo.subfolder || ""
+            )}&type=${encodeURIComponent(imgInfo.type || "output")}`;
+            if (imgInfo.pending != null && img.dataset) {
+              img.dataset.pending = String(imgInfo.pending);
+            }
+          }
           if (!slotContent.has(slot)) {
             slotContent.set(slot, []);
           }
-          const img = new Image();
-          img.src = `/view?filename=${encodeURIComponent(imgInfo.filename)}&subfolder=${encodeURIComponent(
-            imgInfo.subfolder || ""
-          )}&type=${encodeURIComponent(imgInfo.type || "output")}`;
           slotContent.get(slot).push({ type: "image", element: img });
         }
         for (const entry of textEntries) {
@@ -1,4 +1,4 @@
-﻿import {connectPending, consumePendingConnection, DeferMicrotask, GetGraph, GetInputLink, GetLgInput, GetLink, GetLinkTypeFromEndpoints, IsGraphLoading, IsNodes2Mode, UpdatePreviewNodeSize} from '@/utils';
+﻿import {connectPending, consumePendingConnection, DeferMicrotask, GetComfyApi, GetGraph, GetInputLink, GetLgInput, GetLink, GetLinkTypeFromEndpoints, IsGraphLoading, IsNodes2Mode, UpdatePreviewNodeSize} from '@/utils';
 import {ComfyApp, ComfyExtension, ComfyNodeDef} from '@comfyorg/comfyui-frontend-types';
 import {ANY_TYPE, MAX_SOCKETS} from '@/types/tojioo';
 import logger_internal, {loggerInstance} from '@/logger_internal';
@@ -20,6 +20,52 @@ export function configureDynamicPreview(): ComfyExtension
 				return;
 			}
 
+			// Frames sent by the websocket preview transport arrive as b_preview events while the node is executing
+			const binaryFrames: { nodeId: string | null; frames: Blob[] } = {nodeId: null, frames: []};
+			const comfyApi = GetComfyApi();
+			comfyApi?.addEventListener?.("executing", (e: CustomEvent) =>
+			{
+				const detail = e.detail;
+				binaryFrames.nodeId = detail == null ? null : String(typeof detail === "object" ? detail.node : detail);
+				binaryFrames.frames = [];
+			});
+			comfyApi?.addEventListener?.("b_preview", (e: CustomEvent) =>
+			{
+				if (binaryFrames.nodeId != null && e.detail instanceof Blob)
+				{
+					binaryFrames.frames.push(e.detail);
+				}
+			});
+
+			function takeBinaryFrames(node: any): Blob[]
+			{
+				const id = binaryFrames.nodeId;
+				if (id == null || (id !== String(node.id) && !id.endsWith(`:${node.id}`)))
+				{
+					return [];
+				}
+				const frames = binaryFrames.frames;
+				binaryFrames.frames = [];
+				return frames;
+			}
+
+			// Core paints every b_preview frame as the image of the executing node, on top of our own preview
+			function clearCorePreview(node: any): void
+			{
+				const previews = (window as any).app?.nodePreviewImages;
+				if (!previews)
+				{
+					return;
+				}
+				for (const key of [String(node.id), binaryFrames.nodeId])
+				{
+					if (key != null && previews[key])
+					{
+						delete previews[key];
+					}
+				}
+			}
+
 			(nodeType.prototype as any)._currentImageIndex = 0;
 			(nodeType.prototype as any)._previewItems = [] as PreviewItem[];
 			(nodeType.prototype as any)._totalImages = 0;
@@ -122,6 +168,30 @@ export function configureDynamicPreview(): ComfyExtension
 				GetGraph(node)?.setDirtyCanvas?.(true, true);
 			}
 
+			// Temp previews written in the background may not exist yet when first requested. The backend reports how
+			// many writes were queued ahead of each file, and the retry window grows with that depth.
+			function retryTempImage(img: HTMLImageElement): void
+			{
+				if (typeof img.src !== "string" || !img.src.includes("/view?"))
+				{
+					return;
+				}
+				const pending = Number(img.dataset?.pending ?? 0) || 0;
+				const deadline = Date.now() + 3000 + 1000 * pending;
+				let tries = 0;
+				img.onerror = () =>
+				{
+					if (Date.now() > deadline)
+					{
+						img.onerror = null;
+						return;
+					}
+					tries++;
+					const base = img.src.replace(/&retry=\d+$/, "");
+					setTimeout(() => img.src = `${base}&retry=${tries}`, Math.min(200 * tries, 1000));
+				};
+			}
+
 			function createPreviewWidget(node: any): void
 			{
 				if (node._previewContainer)
@@ -299,6 +369,7 @@ export function configureDynamicPreview(): ComfyExtension
 					});
 
 					const img = item.element.cloneNode(true) as HTMLImageElement;
+					retryTempImage(img);
 					Object.assign(img.style, {
 						maxWidth: "100%",
 						maxHeight: "100%",
@@ -409,16 +480,52 @@ export function configureDynamicPreview(): ComfyExtension
 				const previewItems: PreviewItem[] = [];
 				const slotContent = new Map<number, PreviewItem[]>();
 
+				let frames: Blob[] = [];
+				if (images.some((i: any) => i?.type === "binary"))
+				{
+					clearCorePreview(node);
+					frames = takeBinaryFrames(node);
+					// Cached executions re-send "executed" without the frames, so keep showing the previous ones
+					if (frames.length === 0)
+					{
+						frames = node._previewBlobs ?? [];
+					}
+				}
+				node._previewBlobs = frames;
+				for (const url of node._previewObjectUrls ?? [])
+				{
+					URL.revokeObjectURL(url);
+				}
+				node._previewObjectUrls = [];
+
 				for (const imgInfo of images)
 				{
 					const slot = imgInfo.slot ?? 0;
+					const img = new Image();
+					if (imgInfo.type === "binary")
+					{
+						const blob = frames[imgInfo.index ?? -1];
+						if (!blob)
+						{
+							continue;
+						}
+						const url = URL.createObjectURL(blob);
+						node._previewObjectUrls.push(url);
+						img.src = url;
+					}
+					else
+					{
+						img.src = `/view?filename=${encodeURIComponent(imgInfo.filename)}&subfolder=${encodeURIComponent(
+							imgInfo.subfolder || "")}&type=${encodeURIComponent(imgInfo.type || "output")}`;
+						if (imgInfo.pending != null && img.dataset)
+						{
+							img.dataset.pending = String(imgInfo.pending);
+						}
+					}
 					if (!slotContent.has(slot))
 					{
 						slotContent.set(slot, []);
 					}
-					const img = new Image();
-					img.src = `/view?filename=${encodeURIComponent(imgInfo.filename)}&subfolder=${encodeURIComponent(
-						imgInfo.subfolder || "")}&type=${encodeURIComponent(imgInfo.type || "output")}`;
 					slotContent.get(slot)!.push({type: "image", element: img});
 				}
 
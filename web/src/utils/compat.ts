@@ -51,4 +51,14 @@ export function IsNodes2Mode(): boolean
 	{
 	}
 	return false;
+}
+
+export function GetComfyApi(): any | null
+{
+	if (typeof window === "undefined")
+	{
+		return null;
+	}
+	const w = window as any;
+	return w.comfyAPI?.api?.api ?? w.app?.api ?? null;
 }
\ No newline at end of file
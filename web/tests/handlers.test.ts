@@ -737,6 +737,31 @@ function makeDynamicPreviewCases(): Array<{ name: string; steps: (ctx: HandlerCo
 				];
 			},
 		},
+		{
+			name: "keeps previous binary frames when a cached execution sends none",
+			steps: (ctx) =>
+			{
+				const blob = new Blob(["png"], {type: "image/png"});
+				const message = {preview_data: [{type: "binary", slot: 0, index: 0}], text_data: []};
+
+				return [
+					{
+						act: () =>
+						{
+							ctx.node._previewBlobs = [blob];
+							ctx.nodeType.prototype.onExecuted.call(ctx.node, message);
+						},
+						assert: () =>
+						{
+							expect(ctx.node._previewItems.length).toBe(1);
+							expect(ctx.node._previewItems[0].type).toBe("image");
+							expect(ctx.node._previewBlobs).toEqual([blob]);
+							expect(ctx.node._previewObjectUrls.length).toBe(1);
+						},
+					},
+				];
+			},
+		},
 		{
 			name: "handles mixed image and text preview data",
 			steps: (ctx) =>